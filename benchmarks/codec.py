@@ -0,0 +1,80 @@
+"""
+Decode/encode throughput of each available JSON codec backend.
+
+    python benchmarks/codec.py [--records 20000] [--fields 50] [--runs 3]
+"""
+
+import argparse
+import random
+import string
+import sys
+from time import perf_counter
+
+from nadi.sdk.codec import Codecs
+
+
+def generate_records(count: int, fields: int) -> list[dict[str, object]]:
+    rng = random.Random(0)
+    return [
+        {
+            f"field_{i}": rng.choice(
+                [
+                    rng.random(),
+                    rng.randint(0, 1 << 40),
+                    "".join(rng.choices(string.ascii_letters, k=16)),
+                    None,
+                    [1, 2, 3],
+                ]
+            )
+            for i in range(fields)
+        }
+        for _ in range(count)
+    ]
+
+
+def best_of(runs: int, func) -> float:
+    timings = []
+    for _ in range(runs):
+        started_at = perf_counter()
+        func()
+        timings.append(perf_counter() - started_at)
+    return min(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--fields", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    records = generate_records(args.records, args.fields)
+    lines = [Codecs.get("stdlib").dumps(record) for record in records]
+    size_mb = sum(len(line) for line in lines) / 1e6
+    print(f"{args.records} records, {size_mb:.1f}MB as JSON lines")
+
+    results: dict[str, dict[str, float]] = {}
+    for codec_class in Codecs.supported_codecs:
+        if not codec_class.is_available():
+            print(f"{codec_class.name:>8}: not installed")
+            continue
+        codec = Codecs.get(codec_class.name)
+        results[codec.name] = {
+            "decode": best_of(args.runs, lambda: [codec.loads(line) for line in lines]),
+            "encode": best_of(args.runs, lambda: [codec.dumps(rec) for rec in records]),
+        }
+
+    baseline = results["stdlib"]
+    for name, timings in results.items():
+        print(
+            f"{name:>8}: "
+            + ", ".join(
+                f"{op} {size_mb / timing:7.1f}MB/s ({baseline[op] / timing:.1f}x)"
+                for op, timing in timings.items()
+            )
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+FileStream throughput (MB/s of input) for a generated JSON lines file.
+
+    python benchmarks/file.py [--records 1000000] [--workers 1 0] [--validate]
+
+`--workers 0` uses one parser process per CPU, `1` parses in process.
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+from time import perf_counter
+
+from nadi.sdk.file import FileSource, FileStream
+from nadi.sdk.input import Config, RuntimeArguments
+
+
+class NullFileSource(FileSource):
+    def _get_output(self):
+        return open(os.devnull, "wb")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 0])
+    parser.add_argument("--chunk-size", type=int, default=16 * 1024 * 1024)
+    parser.add_argument("--validate", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "records.jsonl")
+        rng = random.Random(0)
+        with open(path, "w") as file:
+            for i in range(args.records):
+                record = {
+                    "id": i,
+                    "name": "".join(rng.choices(string.ascii_letters, k=24)),
+                    "score": rng.random(),
+                    "tags": ["a", "b", "c"],
+                }
+                file.write(json.dumps(record) + "\n")
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"{args.records} records, {size_mb:.1f}MB, {os.cpu_count()} CPUs")
+
+        source = NullFileSource("bench")
+        source.supported_streams = [
+            FileStream(
+                "records",
+                "",
+                path,
+                output_json_schema={"type": "object", "required": ["id"]},
+            )
+        ]
+        for workers in args.workers:
+            for ordered in [True, False]:
+                RuntimeArguments.config = Config(
+                    {
+                        "nadi.output.enable_schema_validation": args.validate,
+                        "nadi.file.workers": workers,
+                        "nadi.file.ordered": ordered,
+                        "nadi.file.chunk_size": args.chunk_size,
+                    }
+                )
+                started_at = perf_counter()
+                source.fetch_stream("records")
+                elapsed = perf_counter() - started_at
+                print(
+                    f"workers={workers} ordered={ordered!s:<5}: "
+                    f"{size_mb / elapsed:7.1f}MB/s"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+End-to-end fetch throughput against a recorded HTTP cassette, without network.
+
+    python benchmarks/replay.py [--pages 50] [--records 1000] [--runs 3] [--latency]
+        [--codec stdlib]
+
+A synthetic cassette is recorded once, then replayed through the decode and
+the passthrough paths. Passthrough is only used with the stdlib codec, other
+codecs run the decode path for both. Pass `--cassette` to replay an existing
+recording of the `bench` stream instead.
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import tempfile
+from time import perf_counter
+
+from requests import Request
+
+from nadi.sdk.auth import NoRestAuth
+from nadi.sdk.cassette import Cassette, Interaction
+from nadi.sdk.codec import Codecs
+from nadi.sdk.input import Config, RuntimeArguments
+from nadi.sdk.source import Source
+from nadi.sdk.stream import RestStream
+
+URL = "https://bench.test/records"
+
+
+class BenchStream(RestStream):
+    def required_configs(self) -> set[str]:
+        return set()
+
+    def fetch_next_request(self, previous_request, previous_response):
+        if previous_response is None:
+            return previous_request
+        next_page = previous_response.headers.get("X-Next-Page")
+        if next_page is None:
+            return None
+        previous_request.params["page"] = next_page
+        return previous_request
+
+
+class BenchSource(Source):
+    def _get_output(self):
+        return open(os.devnull, "wb")
+
+
+def record_cassette(path: str, pages: int, records: int):
+    rng = random.Random(0)
+    cassette = Cassette.open(path)
+    for page in range(1, pages + 1):
+        params = {"page": str(page)} if page > 1 else {}
+        body = Codecs.get("stdlib").dumps(
+            [
+                {
+                    "id": page * records + i,
+                    "name": "".join(rng.choices(string.ascii_letters, k=24)),
+                    "score": rng.random(),
+                    "tags": ["a", "b", "c"],
+                }
+                for i in range(records)
+            ]
+        )
+        headers = {"Content-Type": "application/json"}
+        if page < pages:
+            headers["X-Next-Page"] = str(page + 1)
+        cassette.record(
+            Request("GET", URL, params=params).prepare(),
+            Interaction(200, "OK", headers, body, 0.05),
+        )
+    Cassette.close_all()
+
+
+def run(path: str, passthrough: bool, latency: bool, codec: str) -> float:
+    source = BenchSource("bench")
+    source.supported_auths = [NoRestAuth()]
+    source.supported_streams = [
+        BenchStream("bench", "", Request("GET", URL), passthrough=passthrough)
+    ]
+    RuntimeArguments.config = Config(
+        {
+            "nadi.output.enable_schema_validation": False,
+            "nadi.http.cassette.mode": "REPLAY",
+            "nadi.http.cassette.path": path,
+            "nadi.http.cassette.replay_latency": latency,
+            "nadi.codec": codec,
+        }
+    )
+    started_at = perf_counter()
+    source.fetch_stream("bench")
+    elapsed = perf_counter() - started_at
+    return source.metrics.get("buffer.records_out") / elapsed  # type: ignore
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--latency", action="store_true")
+    parser.add_argument("--cassette", default=None)
+    parser.add_argument("--codec", default="stdlib")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.cassette
+        if path is None:
+            path = os.path.join(directory, "bench.db")
+            record_cassette(path, args.pages, args.records)
+        for name, passthrough in [("decode", False), ("passthrough", True)]:
+            rate = max(
+                run(path, passthrough, args.latency, args.codec)
+                for _ in range(args.runs)
+            )
+            print(f"{name:>12}: {rate:10.0f} records/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
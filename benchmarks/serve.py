@@ -0,0 +1,90 @@
+"""
+Jobs per second for one process per job against a single `serve` process.
+
+    python benchmarks/serve.py [--jobs 50] [--pages 2] [--records 100]
+
+Both sides replay the same recorded cassette, so only process startup,
+imports, registration and per-job overhead are compared.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+from requests import Request
+
+from nadi.sdk.auth import NoRestAuth
+from nadi.sdk.cli import CLI
+from nadi.sdk.source import Source
+from replay import URL, BenchStream, record_cassette
+
+
+def app():
+    source = Source("bench")
+    source.supported_auths = [NoRestAuth()]
+    source.supported_streams = [BenchStream("bench", "", Request("GET", URL))]
+    CLI.load(source)(args=sys.argv[2:])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--records", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cassette_path = os.path.join(directory, "bench.db")
+        record_cassette(cassette_path, args.pages, args.records)
+        config_path = os.path.join(directory, "config.json")
+        with open(config_path, "w") as config_file:
+            json.dump(
+                {
+                    "nadi.output.enable_schema_validation": False,
+                    "nadi.http.cassette.mode": "REPLAY",
+                    "nadi.http.cassette.path": cassette_path,
+                },
+                config_file,
+            )
+        command = [sys.executable, __file__, "app"]
+
+        started_at = perf_counter()
+        for _ in range(args.jobs):
+            subprocess.run(
+                command + ["fetch", "stream", "bench", "--config", config_path],
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+        per_process = args.jobs / (perf_counter() - started_at)
+
+        jobs = b"".join(
+            json.dumps({"id": i, "stream": "bench"}).encode() + b"\n"
+            for i in range(args.jobs)
+        )
+        started_at = perf_counter()
+        result = subprocess.run(
+            command + ["serve", "--config", config_path],
+            input=jobs,
+            check=True,
+            capture_output=True,
+        )
+        served = args.jobs / (perf_counter() - started_at)
+        statuses = [
+            json.loads(line).get("status") for line in result.stdout.splitlines()
+        ]
+        assert statuses.count("ok") == args.jobs, result.stdout[-1000:]
+
+    print(f"process per job: {per_process:8.1f} jobs/s")
+    print(f"          serve: {served:8.1f} jobs/s ({served / per_process:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["app"]:
+        app()
+    else:
+        sys.exit(main())
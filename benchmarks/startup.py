@@ -0,0 +1,53 @@
+"""
+Startup benchmark for CLI tools built with nadi.sdk.
+
+Runs `python -X importtime -c "import nadi.sdk.cli"` a few times and checks the
+best cumulative import time against a budget. Heavy dependencies which are
+only required while fetching must not be imported at startup.
+
+    python benchmarks/startup.py [--budget-ms 150] [--runs 5]
+"""
+
+import argparse
+import subprocess
+import sys
+
+LAZY_MODULES = ["requests", "jsonschema", "jsonpath_ng"]
+
+
+def import_times(module: str) -> dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="nadi.sdk.cli")
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    best_ms = min(run[args.module] for run in runs) / 1000
+    eager = [module for module in LAZY_MODULES if module in runs[0]]
+
+    print(f"{args.module}: {best_ms:.1f}ms (budget {args.budget_ms:.1f}ms)")
+    if eager:
+        print(f"modules imported eagerly: {eager}")
+    return 0 if best_ms <= args.budget_ms and not eager else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+from contextvars import ContextVar, Token
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from time import sleep
+from typing import TYPE_CHECKING
+from nadi.sdk.metrics import Metrics
+from nadi.sdk.util import Util
+
+if TYPE_CHECKING:
+    from requests import PreparedRequest, Response, Session
+
+
+class AdaptiveController:
+    """
+    AIMD limit on in-flight requests to one host. The limit grows by one per
+    window of successful responses under the target latency, shrinks slightly
+    on slow responses and halves on errors (5xx) or throttling (429/503). Only
+    throttled requests are retried, after their Retry-After delay.
+    """
+
+    throttle_status_codes = [429, 503]
+    slow_decrease = 0.9
+    error_decrease = 0.5
+
+    def __init__(
+        self,
+        host: str,
+        metrics: Metrics,
+        max_concurrency: int = 16,
+        target_latency: float = 1.0,
+        max_retries: int = 5,
+        min_page_size: int = 10,
+        max_page_size: int = 1000,
+        concurrency: float = 1.0,
+        page_sizes: "dict[str, int] | None" = None,
+    ) -> None:
+        self.host = host
+        self.metrics = metrics
+        self.max_concurrency = max(max_concurrency, 1)
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.min_page_size = min_page_size
+        self.max_page_size = max_page_size
+        self.concurrency = min(max(concurrency, 1.0), self.max_concurrency)
+        self.page_sizes = page_sizes if page_sizes is not None else {}
+        self.in_flight = 0
+        self.__condition = threading.Condition()
+        self.metrics.set(f"adaptive.{host}.concurrency", int(self.concurrency))
+
+    def to_dict(self) -> dict[str, object]:
+        with self.__condition:
+            return {"concurrency": self.concurrency, "page_sizes": self.page_sizes}
+
+    def __adjust_concurrency(self, concurrency: float):
+        concurrency = min(max(concurrency, 1.0), self.max_concurrency)
+        changed = int(concurrency) != int(self.concurrency)
+        self.concurrency = concurrency
+        if changed:
+            self.metrics.increment("adaptive.adjustments")
+            self.metrics.set(f"adaptive.{self.host}.concurrency", int(concurrency))
+            self.__condition.notify_all()
+
+    def acquire(self):
+        with self.__condition:
+            while self.in_flight >= int(self.concurrency):
+                self.__condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float | None = None, failed: bool = False):
+        with self.__condition:
+            self.in_flight -= 1
+            if failed or latency is None:
+                self.__adjust_concurrency(self.concurrency * self.error_decrease)
+            elif latency > self.target_latency:
+                self.__adjust_concurrency(self.concurrency * self.slow_decrease)
+            else:
+                self.__adjust_concurrency(self.concurrency + 1 / self.concurrency)
+            self.__condition.notify()
+
+    @staticmethod
+    def get_retry_after(response: "Response", attempt: int) -> float:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+            except (TypeError, ValueError):
+                pass
+        return min(2.0**attempt * 0.1, 30.0)
+
+    def send(
+        self, session: "Session", request: "PreparedRequest", stream: bool = False
+    ) -> "Response":
+        attempt = 0
+        while True:
+            self.acquire()
+            try:
+                response = session.send(request, stream=stream)
+            except BaseException:
+                self.release()
+                raise
+            throttled = response.status_code in self.throttle_status_codes
+            self.release(
+                response.elapsed.total_seconds(),
+                throttled or response.status_code >= 500,
+            )
+            if not throttled or attempt >= self.max_retries:
+                return response
+            response.close()
+            self.metrics.increment("adaptive.retries")
+            sleep(self.get_retry_after(response, attempt))
+            attempt += 1
+
+    def get_page_size(self, stream_name: str, default: int) -> int:
+        with self.__condition:
+            return self.page_sizes.get(stream_name, default)
+
+    def tune_page_size(self, stream_name: str, page_size: int, response: "Response"):
+        # scale toward the target latency, at most doubling or halving per page.
+        latency = max(response.elapsed.total_seconds(), 1e-3)
+        if response.status_code in self.throttle_status_codes:
+            scale = 0.5
+        else:
+            scale = min(max(self.target_latency / latency, 0.5), 2.0)
+        tuned = int(min(max(page_size * scale, self.min_page_size), self.max_page_size))
+        with self.__condition:
+            if tuned == self.page_sizes.get(stream_name, page_size):
+                return
+            self.page_sizes[stream_name] = tuned
+        self.metrics.increment("adaptive.adjustments")
+        self.metrics.set(f"adaptive.{self.host}.{stream_name}.page_size", tuned)
+
+
+class AdaptiveControllers:
+    """
+    Controllers per host for one running pipeline, restored from and saved to
+    `state_path` so tuned values carry over between runs. The pipeline's
+    controllers are found through the context, so sources running side by
+    side keep their own options, metrics and state.
+    """
+
+    __current: "ContextVar[AdaptiveControllers | None]" = ContextVar(
+        "adaptive_controllers", default=None
+    )
+
+    def __init__(
+        self,
+        metrics: Metrics,
+        state_path: str | None = None,
+        **options: object,
+    ) -> None:
+        self.metrics = metrics
+        self.state_path = state_path
+        self.options = options
+        self.__lock = threading.Lock()
+        self.__controllers: dict[str, AdaptiveController] = {}
+        self.__state = self.__read_state()
+        self.__token: "Token[AdaptiveControllers | None] | None" = None
+
+    def __read_state(self) -> dict[str, dict[str, object]]:
+        if self.state_path is None or not os.path.exists(self.state_path):
+            return {}
+        return Util.read_json_file(self.state_path)  # type: ignore
+
+    @classmethod
+    def open(
+        cls,
+        metrics: Metrics,
+        state_path: str | None = None,
+        **options: object,
+    ) -> "AdaptiveControllers":
+        controllers = cls(metrics, state_path, **options)
+        controllers.__token = cls.__current.set(controllers)
+        return controllers
+
+    @classmethod
+    def get(cls, host: str) -> AdaptiveController | None:
+        if (controllers := cls.__current.get()) is None:
+            return None
+        return controllers.get_controller(host)
+
+    def get_controller(self, host: str) -> AdaptiveController:
+        with self.__lock:
+            if host not in self.__controllers:
+                state = self.__state.get(host, {})
+                self.__controllers[host] = AdaptiveController(
+                    host,
+                    self.metrics,
+                    concurrency=state.get("concurrency", 1.0),  # type: ignore
+                    page_sizes=dict(state.get("page_sizes", {})),  # type: ignore
+                    **self.options,  # type: ignore
+                )
+            return self.__controllers[host]
+
+    def close(self):
+        if self.__token is not None:
+            self.__current.reset(self.__token)
+            self.__token = None
+        if self.state_path is None:
+            return
+        with self.__lock:
+            # re-read, other pipelines may have saved hosts of their own since.
+            state = dict(
+                self.__read_state(),
+                **{
+                    host: controller.to_dict()
+                    for host, controller in self.__controllers.items()
+                },
+            )
+        temporary_path = f"{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "w") as state_file:
+            json.dump(state, state_file, indent=2)
+        os.replace(temporary_path, self.state_path)
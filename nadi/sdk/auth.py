@@ -1,38 +1,46 @@
-import contextlib
 from abc import abstractmethod
-from requests import Request
+from typing import TYPE_CHECKING
 from nadi.sdk.config import (
-    ConfigIsAlreadySupported,
+    Conf,
     ConfigNotFoundError,
     Configs,
     StringConf,
 )
 
+if TYPE_CHECKING:
+    from requests import Request
+
 
 class Auth:
     def __init__(self, name: str) -> None:
         self.name = name
 
+    def supported_configs(self) -> list[Conf]:
+        return []
+
 
 class RestAuth(Auth):
     def __init__(self, name: str) -> None:
-        with contextlib.suppress(ConfigIsAlreadySupported):
-            Configs.add_supported_config(
-                StringConf(
-                    "nadi.auth.enforce_method",
-                    "NONE",
-                    is_required=False,
-                    is_secret=False,
-                    valid_values=["NONE", "BASIC", "BEARER", "NO_AUTH"],
-                )
-            )
         super().__init__(name)
 
+    def supported_configs(self) -> list[Conf]:
+        return super().supported_configs() + [
+            StringConf(
+                "nadi.auth.enforce_method",
+                "NONE",
+                is_required=False,
+                is_secret=False,
+                valid_values=["NONE", "BASIC", "BEARER", "NO_AUTH"],
+            )
+        ]
+
     @abstractmethod
-    def prepare_request(self, request: Request) -> Request:
+    def prepare_request(self, request: "Request") -> "Request":
         pass
 
     def can_prepare_request(self) -> bool:
+        from requests import Request
+
         try:
             self.prepare_request(Request())
         except ConfigNotFoundError:
@@ -44,21 +52,21 @@ class NoRestAuth(RestAuth):
     def __init__(self) -> None:
         super().__init__("NO_AUTH")
 
-    def prepare_request(self, request: Request) -> Request:
+    def prepare_request(self, request: "Request") -> "Request":
         return request
 
 
 class BasicAuth(RestAuth):
     def __init__(self) -> None:
-        Configs.add_supported_config(
-            StringConf("nadi.auth.basic.username", None, is_required=False)
-        )
-        Configs.add_supported_config(
-            StringConf("nadi.auth.basic.password", None, is_required=False),
-        )
         super().__init__("BASIC")
 
-    def prepare_request(self, request: Request) -> Request:
+    def supported_configs(self) -> list[Conf]:
+        return super().supported_configs() + [
+            StringConf("nadi.auth.basic.username", None, is_required=False),
+            StringConf("nadi.auth.basic.password", None, is_required=False),
+        ]
+
+    def prepare_request(self, request: "Request") -> "Request":
         request.auth = (
             Configs.get_or_error("nadi.auth.basic.username"),
             Configs.get_or_error("nadi.auth.basic.password"),
@@ -68,13 +76,14 @@ class BasicAuth(RestAuth):
 
 class BearerAuth(RestAuth):
     def __init__(self) -> None:
-        Configs.add_supported_config(
-            StringConf("nadi.auth.bearer.token", None, is_required=False)
-        )
-
         super().__init__("BEARER")
 
-    def prepare_request(self, request: Request) -> Request:
+    def supported_configs(self) -> list[Conf]:
+        return super().supported_configs() + [
+            StringConf("nadi.auth.bearer.token", None, is_required=False)
+        ]
+
+    def prepare_request(self, request: "Request") -> "Request":
         request.headers[
             "Authorization"
         ] = f"BEARER {Configs.get_or_error('nadi.auth.bearer.token')}"
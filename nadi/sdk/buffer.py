@@ -0,0 +1,103 @@
+import threading
+from collections import deque
+from time import monotonic
+from nadi.sdk.metrics import Metrics
+
+
+class BufferClosedError(Exception):
+    def __init__(self) -> None:
+        message = "Buffer is closed, no more records can be added."
+        super().__init__(message)
+
+
+class RecordBuffer:
+    """
+    Bounded in-memory queue of serialized records between fetchers and the
+    writer. `put` blocks the calling fetcher while the buffer is over its record
+    or byte capacity, so a slow sink slows fetching down instead of letting
+    memory grow. Items usually hold a page of records; a single item larger
+    than `max_bytes` is still accepted once the buffer is empty.
+    """
+
+    def __init__(
+        self,
+        max_records: int,
+        max_bytes: int,
+        metrics: Metrics | None = None,
+    ) -> None:
+        self.max_records = max(max_records, 1)
+        self.max_bytes = max(max_bytes, 1)
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.__items: deque[tuple[float, bytes, int]] = deque()
+        self.__records = 0
+        self.__bytes = 0
+        self.__closed = False
+        self.__aborted = False
+        self.__condition = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    @property
+    def size_in_bytes(self) -> int:
+        return self.__bytes
+
+    def __is_full(self, item_size: int) -> bool:
+        return len(self.__items) > 0 and (
+            self.__records >= self.max_records
+            or self.__bytes + item_size > self.max_bytes
+        )
+
+    def put(self, item: bytes, records: int = 1):
+        """
+        Adds `item`, which may hold several newline separated `records`.
+        """
+        with self.__condition:
+            if self.__is_full(len(item)) and not self.__aborted:
+                started_at = monotonic()
+                self.metrics.increment("buffer.put_blocked")
+                while self.__is_full(len(item)) and not self.__aborted:
+                    self.__condition.wait()
+                self.metrics.increment(
+                    "buffer.put_wait_seconds", monotonic() - started_at
+                )
+            if self.__closed or self.__aborted:
+                raise BufferClosedError()
+            self.__items.append((monotonic(), item, records))
+            self.__records += records
+            self.__bytes += len(item)
+            self.metrics.increment("buffer.records_in", records)
+            self.metrics.set_max("buffer.max_depth", self.__records)
+            self.metrics.set_max("buffer.max_bytes", self.__bytes)
+            self.__condition.notify_all()
+
+    def get(self) -> "bytes | None":
+        """
+        Returns the next item, blocking while the buffer is empty. Returns
+        None once the buffer is closed (or aborted) and fully drained.
+        """
+        with self.__condition:
+            while not self.__items and not self.__closed and not self.__aborted:
+                self.__condition.wait()
+            if not self.__items or self.__aborted:
+                return None
+            enqueued_at, item, records = self.__items.popleft()
+            self.__records -= records
+            self.__bytes -= len(item)
+            self.metrics.increment("buffer.records_out", records)
+            self.metrics.increment("buffer.latency_seconds", monotonic() - enqueued_at)
+            self.__condition.notify_all()
+            return item
+
+    def close(self):
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+
+    def abort(self):
+        with self.__condition:
+            self.__aborted = True
+            self.__items.clear()
+            self.__records = 0
+            self.__bytes = 0
+            self.__condition.notify_all()
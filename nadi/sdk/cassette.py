@@ -0,0 +1,185 @@
+import io
+import json
+import sqlite3
+import threading
+import zlib
+from datetime import timedelta
+from hashlib import sha256
+from time import perf_counter, sleep
+from typing import Any
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+class CassetteInteractionNotFoundError(Exception):
+    def __init__(self, method: str, url: str) -> None:
+        message = f"Cassette has no recorded interaction for '{method} {url}'."
+        super().__init__(message)
+
+
+class Interaction:
+    def __init__(
+        self,
+        status: int,
+        reason: str,
+        headers: dict[str, str],
+        body: bytes,
+        elapsed: float,
+    ) -> None:
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+
+
+class Cassette:
+    """
+    On-disk (sqlite) store of HTTP interactions indexed by request. Request
+    headers are never stored so credentials do not end up in cassettes.
+    Repeated requests are replayed in recorded order, cycling once exhausted.
+    """
+
+    __cassettes: "dict[str, Cassette]" = {}
+    __cassettes_lock = threading.Lock()
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__cursors: dict[str, int] = {}
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS interactions ("
+            "request_key TEXT NOT NULL, sequence INTEGER NOT NULL, "
+            "method TEXT, url TEXT, status INTEGER, reason TEXT, headers TEXT, "
+            "body BLOB, elapsed REAL, PRIMARY KEY (request_key, sequence))"
+        )
+
+    @classmethod
+    def open(cls, path: str) -> "Cassette":
+        with cls.__cassettes_lock:
+            if path not in cls.__cassettes:
+                cls.__cassettes[path] = Cassette(path)
+            return cls.__cassettes[path]
+
+    @classmethod
+    def close_all(cls):
+        with cls.__cassettes_lock:
+            for cassette in cls.__cassettes.values():
+                cassette.close()
+            cls.__cassettes = {}
+
+    @staticmethod
+    def request_key(request: PreparedRequest) -> str:
+        body = request.body if request.body is not None else b""
+        body = body.encode() if isinstance(body, str) else body
+        return sha256(
+            f"{request.method} {request.url}\n".encode() + bytes(body)  # type: ignore
+        ).hexdigest()
+
+    def record(self, request: PreparedRequest, interaction: Interaction):
+        key = self.request_key(request)
+        with self.__lock:
+            sequence = self.__cursors.get(key, 0)
+            self.__cursors[key] = sequence + 1
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO interactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    sequence,
+                    request.method,
+                    request.url,
+                    interaction.status,
+                    interaction.reason,
+                    json.dumps(interaction.headers),
+                    zlib.compress(interaction.body),
+                    interaction.elapsed,
+                ),
+            )
+            self.__connection.commit()
+
+    def replay(self, request: PreparedRequest) -> Interaction:
+        key = self.request_key(request)
+        with self.__lock:
+            count = self.__connection.execute(
+                "SELECT COUNT(*) FROM interactions WHERE request_key = ?", (key,)
+            ).fetchone()[0]
+            if count == 0:
+                raise CassetteInteractionNotFoundError(
+                    str(request.method), str(request.url)
+                )
+            sequence = self.__cursors.get(key, 0) % count
+            self.__cursors[key] = sequence + 1
+            row = self.__connection.execute(
+                "SELECT status, reason, headers, body, elapsed FROM interactions "
+                "WHERE request_key = ? AND sequence = ?",
+                (key, sequence),
+            ).fetchone()
+        return Interaction(
+            row[0], row[1], json.loads(row[2]), zlib.decompress(row[3]), row[4]
+        )
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+
+class RecordingAdapter(HTTPAdapter):
+    def __init__(self, cassette: Cassette) -> None:
+        self.cassette = cassette
+        super().__init__()
+
+    def send(self, request: PreparedRequest, *args: Any, **kwargs: Any) -> Response:
+        started_at = perf_counter()
+        response = super().send(request, *args, **kwargs)
+        body = response.content
+        # bodies are stored decoded, encoding/length headers no longer apply.
+        headers = {
+            key: value
+            for key, value in response.headers.items()
+            if key.lower() not in ["content-encoding", "content-length"]
+        }
+        self.cassette.record(
+            request,
+            Interaction(
+                response.status_code,
+                str(response.reason),
+                headers,
+                body,
+                perf_counter() - started_at,
+            ),
+        )
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    def __init__(self, cassette: Cassette, replay_latency: bool = False) -> None:
+        self.cassette = cassette
+        self.replay_latency = replay_latency
+        super().__init__()
+
+    def send(
+        self, request: PreparedRequest, stream: bool = False, **kwargs: Any
+    ) -> Response:
+        interaction = self.cassette.replay(request)
+        if self.replay_latency:
+            sleep(interaction.elapsed)
+
+        response = Response()
+        response.status_code = interaction.status
+        response.reason = interaction.reason
+        response.headers = CaseInsensitiveDict(interaction.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(interaction.body)
+        response.url = str(request.url)
+        response.request = request
+        response.connection = self
+        response.elapsed = timedelta(seconds=interaction.elapsed)
+        if not stream:
+            response.content
+        return response
+
+    def close(self):
+        pass
@@ -1,8 +1,11 @@
+import sys
+from json import dumps
 from typing import Annotated
 from typer import Argument, Typer, Option
 from nadi.sdk.config import Configs
 from nadi.sdk.input import RuntimeArguments
 from nadi.sdk.source import Source
+from nadi.sdk.util import Util
 
 
 class CLI:
@@ -30,17 +33,40 @@ class CLI:
             help="get stream details from this file", rich_help_panel="Common Inputs"
         ),
     ]
+    ann_state = Annotated[
+        str,
+        Option(help="get stream state from this file", rich_help_panel="Common Inputs"),
+    ]
+    ann_lazy_load = Annotated[
+        bool,
+        Option(
+            help="stream catalog and state entries on demand instead of loading upfront",
+            rich_help_panel="Flags",
+        ),
+    ]
     ann_limit = Annotated[int, Option(help="limit number of records fetched")]
     ann_dry_run = Annotated[
         bool,
         Option(help="validate without actually executing", rich_help_panel="Flags"),
     ]
+    ann_metrics = Annotated[
+        bool,
+        Option(help="print fetch metrics to stderr once done", rich_help_panel="Flags"),
+    ]
     ann_missing = Annotated[
         bool, Option(help="list only missing configs", rich_help_panel="Flags")
     ]
     ann_simple = Annotated[
         bool, Option(help="list only basic details", rich_help_panel="Flags")
     ]
+    ann_socket = Annotated[
+        str,
+        Option(help="accept jobs on this unix socket instead of stdin"),
+    ]
+    ann_directory = Annotated[
+        str,
+        Option(help="allow jobs to read and write files inside this directory"),
+    ]
     ann_stream_name = Annotated[
         str, Argument(help="stream name that needs to be fetched")
     ]
@@ -50,22 +76,33 @@ class CLI:
         CLI.source = source
         return CLI.app
 
+    @staticmethod
+    def print_metrics(source: Source):
+        print(dumps(source.metrics.to_dict()), file=sys.stderr)
+
     @fetch_app.command("all")
     @staticmethod
     def fetch_all(
         config: ann_config = "",
         catalog: ann_catalog = "",
+        state: ann_state = "",
         limit: ann_limit = -1,
         dry_run: ann_dry_run = False,
+        lazy_load: ann_lazy_load = False,
+        metrics: ann_metrics = False,
     ):
         """
         Fetch all streams defined in --catalog file.
         """
-        RuntimeArguments.setup(config=config, catalog=catalog)
+        RuntimeArguments.setup(
+            config=config, catalog=catalog, state=state, lazy=lazy_load
+        )
         limit_by = None if limit == -1 else limit
 
         if isinstance(CLI.source, Source):
             CLI.source.fetch_all(limit=limit_by, dry_run=dry_run)
+            if metrics:
+                CLI.print_metrics(CLI.source)
 
     @fetch_app.command("stream")
     @staticmethod
@@ -74,6 +111,7 @@ class CLI:
         config: ann_config = "",
         limit: ann_limit = -1,
         dry_run: ann_dry_run = False,
+        metrics: ann_metrics = False,
     ):
         """
         Fetch stream STREAM from supported streams for application.
@@ -82,6 +120,33 @@ class CLI:
         limit_by = None if limit == -1 else limit
         if isinstance(CLI.source, Source):
             CLI.source.fetch_stream(stream_name=stream, limit=limit_by, dry_run=dry_run)
+            if metrics:
+                CLI.print_metrics(CLI.source)
+
+    @app.command("serve")
+    @staticmethod
+    def serve(
+        config: ann_config = "", socket: ann_socket = "", directory: ann_directory = ""
+    ):
+        """
+        Run fetch jobs read as JSON lines from stdin or --socket on a warm source.
+        """
+        from nadi.sdk.server import Server
+
+        if not isinstance(CLI.source, Source):
+            return
+        server = Server(
+            CLI.source,
+            Util.read_json_file(config) if config != "" else None,
+            directory if directory != "" else None,
+        )
+        if socket != "":
+            server.serve_unix_socket(socket)
+        else:
+            try:
+                server.serve(sys.stdin.buffer, sys.stdout.buffer)
+            finally:
+                server.close()
 
     @list_app.command("config")
     @staticmethod
@@ -102,6 +167,7 @@ class CLI:
 
         RuntimeArguments.setup(config=config)
         if isinstance(CLI.source, Source):
+            CLI.source.register_configs()
             for conf in Configs.supported_configs:
                 conf_dict = conf.to_dict()
                 if missing:
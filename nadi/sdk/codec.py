@@ -0,0 +1,115 @@
+from contextvars import ContextVar
+from importlib.util import find_spec
+from typing import Any
+
+
+class CodecNotSupportedError(Exception):
+    def __init__(self, name: str, supported_codecs: list[str]) -> None:
+        message = (
+            f"Codec '{name}' is not supported. Supported codecs are {supported_codecs}"
+        )
+        super().__init__(message)
+
+
+class CodecNotAvailableError(Exception):
+    def __init__(self, name: str, module: str) -> None:
+        message = (
+            f"Codec '{name}' is not available, module '{module}' is not installed."
+        )
+        super().__init__(message)
+
+
+class Codec:
+    name: str = ""
+    module: str = ""
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return find_spec(cls.module) is not None
+
+    def loads(self, data: "bytes | str") -> Any:
+        raise NotImplementedError(
+            "'loads' method has to be implemented by child class."
+        )
+
+    def dumps(self, obj: Any) -> bytes:
+        raise NotImplementedError(
+            "'dumps' method has to be implemented by child class."
+        )
+
+
+class StdlibCodec(Codec):
+    name = "stdlib"
+    module = "json"
+
+    def __init__(self) -> None:
+        import json
+
+        self.__decoder = json.JSONDecoder()
+        self.__encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+    def loads(self, data: "bytes | str") -> Any:
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data).decode("utf-8-sig")
+        return self.__decoder.decode(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.__encoder.encode(obj).encode("utf-8")
+
+
+class OrjsonCodec(Codec):
+    name = "orjson"
+    module = "orjson"
+
+    def __init__(self) -> None:
+        import orjson  # type: ignore
+
+        self.loads = orjson.loads  # type: ignore
+        self.dumps = orjson.dumps  # type: ignore
+
+
+class MsgspecCodec(Codec):
+    name = "msgspec"
+    module = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec  # type: ignore
+
+        self.loads = msgspec.json.Decoder().decode  # type: ignore
+        self.dumps = msgspec.json.Encoder().encode  # type: ignore
+
+
+class Codecs:
+    # order of preference for 'auto', stdlib is always available. stdlib is the
+    # default, the others are opt-in since they differ on edge cases (integers
+    # beyond 64 bits become floats, NaN and Infinity are rejected).
+    supported_codecs: list[type[Codec]] = [OrjsonCodec, MsgspecCodec, StdlibCodec]
+    __instances: dict[str, Codec] = {}
+    __selected: ContextVar[str] = ContextVar("codec", default="stdlib")
+
+    @classmethod
+    def get(cls, name: str = "stdlib") -> Codec:
+        if name == "auto":
+            name = next(
+                codec.name for codec in cls.supported_codecs if codec.is_available()
+            )
+        if (codec := cls.__instances.get(name)) is not None:
+            return codec
+        for codec_class in cls.supported_codecs:
+            if codec_class.name == name:
+                if not codec_class.is_available():
+                    raise CodecNotAvailableError(name, codec_class.module)
+                codec = cls.__instances[name] = codec_class()
+                return codec
+        raise CodecNotSupportedError(
+            name, ["auto"] + [codec.name for codec in cls.supported_codecs]
+        )
+
+    @classmethod
+    def select(cls, name: str):
+        cls.get(name)
+        cls.__selected.set(name)
+
+    @classmethod
+    def current(cls) -> Codec:
+        return cls.get(cls.__selected.get())
@@ -1,4 +1,5 @@
 import contextlib
+from contextvars import Context, ContextVar
 from os import environ
 
 from nadi.sdk.input import RuntimeArguments
@@ -64,6 +65,9 @@ class Conf:
                 self.key, "Given Value is Required, it cannot be None."
             )
 
+    def convert(self, value: object) -> object:
+        return value
+
     def to_dict(self) -> dict[str, object | None]:
         value = None
         with contextlib.suppress(ConfigValueInvalidError):
@@ -119,6 +123,9 @@ class IntConf(Conf):
         super().validate(value)
         self.convert_to_type(value, int)
 
+    def convert(self, value: object) -> object:
+        return self.convert_to_type(value, int)
+
 
 class FloatConf(Conf):
     def __init__(
@@ -135,6 +142,9 @@ class FloatConf(Conf):
         super().validate(value)
         self.convert_to_type(value, float)
 
+    def convert(self, value: object) -> object:
+        return self.convert_to_type(value, float)
+
 
 class BooleanConf(Conf):
     def __init__(
@@ -154,9 +164,26 @@ class BooleanConf(Conf):
         if not isinstance(value, bool):
             raise ConfigTypeInvalidError(self.key, type(value), bool)
 
+    def convert(self, value: object) -> object:
+        if isinstance(value, str):
+            return value.lower() == "true"
+        return value
+
 
-class Configs:
-    supported_configs: list[Conf] = [
+class ConfigsMeta(type):
+    # supported configs are kept per context, so sources sharing a process can
+    # each register their own.
+    @property
+    def supported_configs(cls) -> list[Conf]:
+        return cls._supported_configs.get()  # type: ignore
+
+    @supported_configs.setter
+    def supported_configs(cls, supported_configs: list[Conf]):
+        cls._supported_configs.set(supported_configs)  # type: ignore
+
+
+class Configs(metaclass=ConfigsMeta):
+    base_supported_configs: tuple[Conf, ...] = (
         StringConf(
             "nadi.output.format",
             "jsonlines",
@@ -174,7 +201,19 @@ class Configs:
             True,
             is_secret=False,
         ),
-    ]
+    )
+    _supported_configs: ContextVar[list[Conf]] = ContextVar(
+        "supported_configs", default=list(base_supported_configs)
+    )
+
+    @classmethod
+    def new_context(cls) -> Context:
+        """
+        Context with only the base configs supported and no runtime arguments.
+        """
+        context = Context()
+        context.run(cls._supported_configs.set, list(cls.base_supported_configs))
+        return context
 
     @classmethod
     def add_supported_config(cls, in_conf: Conf):
@@ -220,7 +259,7 @@ class Configs:
         if value is None:
             value = conf.default_value
         conf.validate(value)
-        return value
+        return conf.convert(value)
 
     @classmethod
     def get_or_error(cls, key: str) -> "object":
@@ -0,0 +1,122 @@
+import math
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sqlite3 import Connection
+
+
+class Deduplicator:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def add(self, key: bytes) -> bool:
+        """
+        Adds key to the seen set, returns False when it was already seen.
+        """
+        raise NotImplementedError("'add' method has to be implemented by child class.")
+
+    def close(self):
+        pass
+
+
+class ExactDeduplicator(Deduplicator):
+    """
+    Keeps the most recently seen `max_keys` keys in memory, older keys are
+    spilled to an on-disk sqlite set so duplicates are still detected exactly.
+    """
+
+    def __init__(self, max_keys: int, spill_directory: str | None = None) -> None:
+        super().__init__()
+        self.max_keys = max(max_keys, 1)
+        self.spill_directory = spill_directory
+        self.__keys: OrderedDict[bytes, None] = OrderedDict()
+        self.__spill_path: str | None = None
+        self.__spill: "Connection | None" = None
+
+    def __spill_keys(self, keys: list[bytes]):
+        if self.__spill is None:
+            import sqlite3
+
+            file_descriptor, self.__spill_path = tempfile.mkstemp(
+                prefix="nadi-dedup-", suffix=".sqlite", dir=self.spill_directory
+            )
+            os.close(file_descriptor)
+            self.__spill = sqlite3.connect(self.__spill_path, check_same_thread=False)
+            self.__spill.execute("PRAGMA journal_mode=OFF")
+            self.__spill.execute("PRAGMA synchronous=OFF")
+            self.__spill.execute(
+                "CREATE TABLE keys (key BLOB PRIMARY KEY) WITHOUT ROWID"
+            )
+        self.__spill.executemany(
+            "INSERT OR IGNORE INTO keys VALUES (?)", [(key,) for key in keys]
+        )
+
+    def __is_spilled(self, key: bytes) -> bool:
+        if self.__spill is None:
+            return False
+        cursor = self.__spill.execute("SELECT 1 FROM keys WHERE key = ?", (key,))
+        return cursor.fetchone() is not None
+
+    def add(self, key: bytes) -> bool:
+        with self._lock:
+            if key in self.__keys:
+                self.__keys.move_to_end(key)
+                return False
+            if self.__is_spilled(key):
+                return False
+            self.__keys[key] = None
+            if len(self.__keys) > self.max_keys:
+                # spill in batches to keep sqlite round trips low.
+                evicted = max(self.max_keys // 10, 1)
+                self.__spill_keys(
+                    [self.__keys.popitem(last=False)[0] for _ in range(evicted)]
+                )
+            return True
+
+    def close(self):
+        with self._lock:
+            if self.__spill is not None:
+                self.__spill.close()
+                self.__spill = None
+            if self.__spill_path is not None:
+                os.remove(self.__spill_path)
+                self.__spill_path = None
+
+
+class BloomDeduplicator(Deduplicator):
+    """
+    Probabilistic seen set with fixed memory, sized for `expected_records` at
+    the given false positive rate. A false positive drops a unique record.
+    """
+
+    def __init__(self, expected_records: int, false_positive_rate: float) -> None:
+        super().__init__()
+        expected_records = max(expected_records, 1)
+        false_positive_rate = min(max(false_positive_rate, 1e-12), 0.5)
+        self.size = max(
+            int(-expected_records * math.log(false_positive_rate) / math.log(2) ** 2),
+            8,
+        )
+        self.hash_count = max(round(self.size / expected_records * math.log(2)), 1)
+        self.__bits = bytearray((self.size + 7) // 8)
+
+    def __positions(self, key: bytes) -> list[int]:
+        digest = blake2b(key, digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8]), int.from_bytes(digest[8:]) | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, key: bytes) -> bool:
+        positions = self.__positions(key)
+        with self._lock:
+            is_new = False
+            for position in positions:
+                mask = 1 << (position & 7)
+                if not self.__bits[position >> 3] & mask:
+                    self.__bits[position >> 3] |= mask
+                    is_new = True
+            return is_new
@@ -0,0 +1,321 @@
+import csv
+import io
+import mmap
+import os
+from collections import deque
+from contextlib import closing
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Generator
+from nadi.sdk.auth import Auth
+from nadi.sdk.codec import Codecs
+from nadi.sdk.config import BooleanConf, Conf, Configs, IntConf
+from nadi.sdk.projection import Projection
+from nadi.sdk.source import Source
+from nadi.sdk.stream import RecordLimit, Stream, StreamDoesNotHaveOutputSchemaError
+from nadi.sdk.util import Util
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+
+class FileFormatNotSupportedError(Exception):
+    def __init__(self, stream_name: str, file_format: str) -> None:
+        message = f"Stream '{stream_name}' has unsupported file format '{file_format}'. Supported formats are {FileStream.supported_formats}"
+        super().__init__(message)
+
+
+class FileChunk:
+    """
+    Byte range of a file, both ends aligned to line boundaries.
+    """
+
+    def __init__(self, path: str, start: int, end: int) -> None:
+        self.path = path
+        self.start = start
+        self.end = end
+
+
+class FileChunkParser:
+    """
+    Parses, projects, validates and encodes one chunk into JSON lines. Runs in
+    worker processes, so it only holds picklable options.
+    """
+
+    def __init__(
+        self,
+        file_format: str,
+        codec: str,
+        select: "list[str] | None" = None,
+        schema: "str | None" = None,
+        fieldnames: "list[str] | None" = None,
+        delimiter: str = ",",
+        encoding: str = "utf-8",
+    ) -> None:
+        self.file_format = file_format
+        self.codec = codec
+        self.select = select
+        # schema as JSON text, validators are cached per process by content.
+        self.schema = schema
+        self.fieldnames = fieldnames
+        self.delimiter = delimiter
+        self.encoding = encoding
+
+    @staticmethod
+    @lru_cache(16)
+    def get_validator(schema: str) -> Any:
+        return Util.get_schema_validator(Codecs.get("stdlib").loads(schema))
+
+    @staticmethod
+    @lru_cache(16)
+    def get_projection(select: "tuple[str, ...]") -> Projection:
+        return Projection(list(select))
+
+    def iter_records(self, data: bytes) -> Generator[object, None, None]:
+        if self.file_format == "csv":
+            fieldnames = self.fieldnames or []
+            for row in csv.reader(
+                io.StringIO(data.decode(self.encoding), newline=""),
+                delimiter=self.delimiter,
+            ):
+                if row:
+                    yield dict(zip(fieldnames, row))
+            return
+        loads = Codecs.get(self.codec).loads
+        for line in data.split(b"\n"):
+            if line.strip():
+                yield loads(line)
+
+    def parse(self, chunk: FileChunk) -> tuple[bytes, int]:
+        with open(chunk.path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                data = mapped[chunk.start : chunk.end]
+
+        dumps = Codecs.get(self.codec).dumps
+        projection = self.get_projection(tuple(self.select)) if self.select else None
+        validator = self.get_validator(self.schema) if self.schema else None
+        lines = []
+        for record in self.iter_records(data):
+            if projection is not None:
+                record = projection.apply(record)
+            if validator is not None:
+                validator.validate(record)
+            lines.append(dumps(record))
+        if not lines:
+            return b"", 0
+        return b"\n".join(lines) + b"\n", len(lines)
+
+
+def parse_chunk(parser: FileChunkParser, chunk: FileChunk) -> tuple[bytes, int]:
+    return parser.parse(chunk)
+
+
+class FileStream(Stream):
+    """
+    Records of a local JSON lines or CSV file. The file is memory-mapped and
+    split into line aligned chunks of `nadi.file.chunk_size`, parsed by
+    `nadi.file.workers` processes, no more than there are chunks, with at most
+    `nadi.file.max_in_flight` chunks pending. Output keeps file order unless `nadi.file.ordered` is off.
+    CSV values must not contain line breaks.
+    """
+
+    supported_formats = ["jsonl", "csv"]
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        path: str,
+        file_format: str = "jsonl",
+        output_json_schema: "str | dict[str, object] | None" = None,
+        group: str | None = None,
+        tags: list[str] | None = None,
+        delimiter: str = ",",
+        encoding: str = "utf-8",
+        primary_key: str | None = None,
+    ) -> None:
+        super().__init__(
+            name, description, output_json_schema, group, tags, primary_key=primary_key
+        )
+        if file_format not in self.supported_formats:
+            raise FileFormatNotSupportedError(name, file_format)
+        # may hold placeholders for configs, e.g. `{data_directory}/users.jsonl`.
+        self.path = path
+        self.file_format = file_format
+        self.delimiter = delimiter
+        self.encoding = encoding
+
+    def required_configs(self) -> set[str]:
+        return set(Util.extract_format_args_from_string(self.path))
+
+    def can_passthrough(self, select: "list[str] | None" = None) -> bool:
+        # records are projected, validated and encoded by the chunk parsers.
+        return True
+
+    def get_chunks(
+        self, path: str, chunk_size: int
+    ) -> "tuple[list[str] | None, list[FileChunk]]":
+        size = os.path.getsize(path)
+        fieldnames = None
+        start = 0
+        if self.file_format == "csv" and size > 0:
+            with open(path, "rb") as file:
+                header = file.readline()
+            start = len(header)
+            fieldnames = next(
+                csv.reader([header.decode(self.encoding)], delimiter=self.delimiter)
+            )
+
+        # boundaries are found upfront, the pool is sized by the chunk count.
+        chunks: list[FileChunk] = []
+        if start >= size:
+            return fieldnames, chunks
+        with open(path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                while start < size:
+                    end = min(start + chunk_size, size)
+                    if end < size:
+                        newline = mapped.find(b"\n", end - 1)
+                        end = newline + 1 if newline != -1 else size
+                    chunks.append(FileChunk(path, start, end))
+                    start = end
+        return fieldnames, chunks
+
+    def get_parser(
+        self,
+        fieldnames: "list[str] | None" = None,
+        select: "list[str] | None" = None,
+    ) -> FileChunkParser:
+        schema = None
+        if Configs.get_or_error("nadi.output.enable_schema_validation"):
+            output_json_schema = self.get_output_json_schema(
+                Projection(select) if select else None
+            )
+            if output_json_schema is None:
+                raise StreamDoesNotHaveOutputSchemaError(self.name)
+            schema = Codecs.get("stdlib").dumps(output_json_schema).decode()
+        return FileChunkParser(
+            self.file_format,
+            Codecs.current().name,
+            select,
+            schema,
+            fieldnames,
+            self.delimiter,
+            self.encoding,
+        )
+
+    def _get_executor(self, workers: int) -> "Executor | None":
+        from concurrent.futures import ProcessPoolExecutor
+        from multiprocessing import get_context
+
+        if workers <= 1:
+            return None
+        # spawned workers do not inherit the fetch and writer threads.
+        return ProcessPoolExecutor(workers, mp_context=get_context("spawn"))
+
+    def _parse_chunks(
+        self,
+        parser: FileChunkParser,
+        chunks: list[FileChunk],
+    ) -> Generator[tuple[bytes, int], None, None]:
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        workers = int(Configs.get_or_error("nadi.file.workers"))  # type: ignore
+        workers = workers if workers > 0 else os.cpu_count() or 1
+        # a single chunk is parsed in this process, without starting a pool.
+        workers = min(workers, len(chunks))
+        max_in_flight = int(Configs.get_or_error("nadi.file.max_in_flight"))  # type: ignore
+        max_in_flight = max_in_flight if max_in_flight > 0 else 2 * workers
+        ordered = bool(Configs.get_or_error("nadi.file.ordered"))
+
+        if (executor := self._get_executor(workers)) is None:
+            for chunk in chunks:
+                yield parser.parse(chunk)
+            return
+
+        pending: "deque[Future[tuple[bytes, int]]]" = deque()
+        try:
+            for chunk in chunks:
+                pending.append(executor.submit(parse_chunk, parser, chunk))
+                while len(pending) >= max_in_flight:
+                    if ordered:
+                        yield pending.popleft().result()
+                        continue
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                        yield future.result()
+            while pending:
+                if ordered:
+                    yield pending.popleft().result()
+                    continue
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def fetch_raw(
+        self,
+        auth: Auth,
+        limit: int | None = None,
+        context: "dict[str, object] | None" = None,
+        select: "list[str] | None" = None,
+    ) -> Generator[bytes, None, None]:
+        record_limit = RecordLimit(limit)
+        path = self._replace_arguments_with_value(self.path, context)
+        fieldnames, chunks = self.get_chunks(
+            path, max(int(Configs.get_or_error("nadi.file.chunk_size")), 1)  # type: ignore
+        )
+        parsed = self._parse_chunks(self.get_parser(fieldnames, select), chunks)
+        with closing(parsed):
+            for lines, count in parsed:
+                if count == 0:
+                    continue
+                if record_limit.remaining is not None:
+                    if count > record_limit.remaining:
+                        lines = b"".join(
+                            line + b"\n"
+                            for line in lines.split(b"\n")[: record_limit.remaining]
+                        )
+                        count = record_limit.remaining
+                    record_limit.remaining -= count
+                yield lines
+                if record_limit.is_reached:
+                    return
+
+    def fetch(
+        self,
+        auth: Auth,
+        limit: int | None = None,
+        context: "dict[str, object] | None" = None,
+        select: "list[str] | None" = None,
+    ) -> Generator[dict[str, object] | list[dict[str, object]], None, None]:
+        loads = Codecs.current().loads
+        for lines in self.fetch_raw(auth, limit, context, select):
+            yield [loads(line) for line in lines.splitlines()]
+
+    def to_dict(self) -> dict[str, object]:
+        return dict(
+            super().to_dict(),
+            path=self.path,
+            file_format=self.file_format,
+        )
+
+
+class FileSource(Source):
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.supported_auths = [Auth("FILE")]
+
+    def sdk_configs(self) -> list[Conf]:
+        return super().sdk_configs() + [
+            IntConf("nadi.file.workers", 0, is_secret=False),
+            IntConf("nadi.file.chunk_size", 16 * 1024 * 1024, is_secret=False),
+            IntConf("nadi.file.max_in_flight", 0, is_secret=False),
+            BooleanConf("nadi.file.ordered", True, is_secret=False),
+        ]
+
+    def get_auth(self) -> Auth:
+        self.register_configs()
+        return self.supported_auths[0]
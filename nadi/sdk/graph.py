@@ -0,0 +1,161 @@
+import threading
+from contextvars import copy_context
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+from nadi.sdk.input import JSONLineData
+from nadi.sdk.util import Util
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ThreadPoolExecutor
+    from nadi.sdk.stream import Stream
+
+
+class StreamParentNotSupportedError(Exception):
+    def __init__(self, stream_name: str, parent_name: str) -> None:
+        message = (
+            f"Parent stream '{parent_name}' of stream '{stream_name}' is not supported."
+        )
+        super().__init__(message)
+
+
+class StreamGraphCycleError(Exception):
+    def __init__(self, stream_names: list[str]) -> None:
+        message = f"Streams {stream_names} have cyclic parent dependencies."
+        super().__init__(message)
+
+
+class StreamNode:
+    def __init__(self, stream: "Stream", catalog: JSONLineData | None) -> None:
+        self.stream = stream
+        # nodes without a catalog entry are only fetched to feed their children.
+        self.catalog = catalog
+        self.children: list[StreamNode] = []
+
+    @property
+    def name(self) -> str:
+        return self.stream.name
+
+    @property
+    def emit(self) -> bool:
+        return self.catalog is not None
+
+    @property
+    def configs(self) -> dict[str, object]:
+        if self.catalog is None or self.catalog.configs is None:
+            return {}
+        return self.catalog.configs
+
+    @property
+    def select(self) -> "list[str] | None":
+        return self.catalog.select if self.catalog is not None else None
+
+    def bind(
+        self, record: object, context: "dict[str, object] | None" = None
+    ) -> "dict[str, object] | None":
+        bound = dict(context) if context is not None else {}
+        for placeholder, json_path in self.stream.parent_bindings.items():
+            values = Util.filter_records_by_json_path(record, json_path)
+            if not values:
+                return None
+            bound[placeholder] = values[0]
+        return bound
+
+
+class StreamGraph:
+    def __init__(self, streams: "list[Stream]") -> None:
+        self.streams = {stream.name: stream for stream in streams}
+        self.linked_streams: set[str] = set()
+        for stream in streams:
+            if stream.parent is not None:
+                self.linked_streams.update([stream.name, stream.parent])
+
+    def is_linked(self, stream_name: str) -> bool:
+        return stream_name in self.linked_streams
+
+    def lineage(self, stream_name: str) -> list[str]:
+        names = [stream_name]
+        while (parent := self.streams[names[-1]].parent) is not None:
+            if parent not in self.streams:
+                raise StreamParentNotSupportedError(names[-1], parent)
+            if parent in names:
+                raise StreamGraphCycleError(names)
+            names.append(parent)
+        return names
+
+    def build(self, catalogs: Iterable[JSONLineData]) -> list[StreamNode]:
+        # every catalog entry becomes a node, parents which are not part of the
+        # catalog are added (once) so their children can still be fetched.
+        nodes: dict[str, list[StreamNode]] = {}
+        implicit: dict[str, StreamNode] = {}
+        for catalog in catalogs:
+            self.lineage(catalog.name)
+            nodes.setdefault(catalog.name, []).append(
+                StreamNode(self.streams[catalog.name], catalog)
+            )
+
+        def _parents(stream_name: str) -> list[StreamNode]:
+            if stream_name in nodes:
+                return nodes[stream_name]
+            if stream_name not in implicit:
+                implicit[stream_name] = StreamNode(self.streams[stream_name], None)
+                parent = self.streams[stream_name].parent
+                if parent is not None:
+                    for node in _parents(parent):
+                        node.children.append(implicit[stream_name])
+            return [implicit[stream_name]]
+
+        roots: list[StreamNode] = []
+        for stream_name, stream_nodes in list(nodes.items()):
+            parent = self.streams[stream_name].parent
+            if parent is None:
+                roots.extend(stream_nodes)
+                continue
+            for node in _parents(parent):
+                node.children.extend(stream_nodes)
+        roots.extend(node for node in implicit.values() if node.stream.parent is None)
+        return roots
+
+
+class StreamGraphExecutor:
+    """
+    Runs child fetches with bounded concurrency. Every depth of the graph has
+    its own pool, a parent blocks while its children's pool is saturated but
+    a pool never waits on itself.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max(max_workers, 1)
+        self.__pools: dict[int, tuple["ThreadPoolExecutor", threading.Semaphore]] = {}
+        self.__lock = threading.Lock()
+
+    def __enter__(self) -> "StreamGraphExecutor":
+        return self
+
+    def __exit__(self, *_: Any):
+        self.shutdown()
+
+    def __pool(self, depth: int) -> tuple["ThreadPoolExecutor", threading.Semaphore]:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with self.__lock:
+            if depth not in self.__pools:
+                self.__pools[depth] = (
+                    ThreadPoolExecutor(self.max_workers),
+                    threading.Semaphore(self.max_workers),
+                )
+            return self.__pools[depth]
+
+    def submit(
+        self, depth: int, func: Callable[..., None], *args: Any
+    ) -> "Future[None]":
+        executor, slots = self.__pool(depth)
+        slots.acquire()
+        future = executor.submit(copy_context().run, func, *args)
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def shutdown(self):
+        with self.__lock:
+            pools = list(self.__pools.values())
+            self.__pools = {}
+        for executor, _ in pools:
+            executor.shutdown()
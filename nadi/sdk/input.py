@@ -1,3 +1,6 @@
+import threading
+from contextvars import ContextVar
+from typing import Generator
 from nadi.sdk.util import Util
 
 
@@ -20,52 +23,99 @@ class JSONConfigInput:
 
 
 class JSONLineData:
-    def __init__(self, name: str, configs: "dict[str, object] | None") -> None:
+    def __init__(
+        self,
+        name: str,
+        configs: "dict[str, object] | None",
+        select: "list[str] | None" = None,
+    ) -> None:
         self.name = name
         self.configs = configs
+        self.select = select
 
 
 class JSONLinesConfigInput:
+    json_line_schema: dict[str, object] = {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "configs": {"type": "object"},
+            "select": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["name"],
+    }
+
     def __init__(
         self,
         json_data: "str | list[dict[str, object]]",
+        lazy: bool = False,
     ) -> None:
+        self.lazy = lazy
         self.load_json_lines_data(json_data)
-        self.__stream_config: dict[str, object] = {}
+        # streams can be fetched concurrently, each thread tracks its own entry.
+        self.__local = threading.local()
 
     def load_json_lines_data(self, json_data: "str | list[dict[str, object]]"):
         self.json_path = json_data if isinstance(json_data, str) else None
-        json_data = (
-            Util.read_json_lines_file(json_data)
-            if isinstance(json_data, str)
-            else json_data
+        self.__raw_json_data = json_data if isinstance(json_data, list) else None
+        self.__json_lines_data: "list[JSONLineData] | None" = None
+        self.__index: "dict[str, JSONLineData | int] | None" = None
+        if not self.lazy:
+            self.__json_lines_data = list(self.iter_json_lines_data())
+
+    def _to_json_line_data(self, line: "dict[str, object]") -> JSONLineData:
+        Util.validate_against_schema(line, self.json_line_schema)
+        return JSONLineData(
+            line.get("name"), line.get("configs"), line.get("select")  # type: ignore
         )
-        self.json_lines_data: list[JSONLineData] = []
-        for line in json_data:
-            Util.validate_against_schema(
-                line,
-                {
-                    "type": "object",
-                    "properties": {
-                        "name": {"type": "string"},
-                        "configs": {"type": "object"},
-                    },
-                    "required": ["name"],
-                },
-            )
-            self.json_lines_data.append(
-                JSONLineData(line.get("name"), line.get("configs"))  # type: ignore
+
+    @property
+    def json_lines_data(self) -> list[JSONLineData]:
+        if self.__json_lines_data is not None:
+            return self.__json_lines_data
+        return list(self.iter_json_lines_data())
+
+    def iter_json_lines_data(self) -> Generator[JSONLineData, None, None]:
+        if self.__json_lines_data is not None:
+            yield from self.__json_lines_data
+        elif self.__raw_json_data is not None:
+            for line in self.__raw_json_data:
+                yield self._to_json_line_data(line)
+        elif self.json_path is not None:
+            for line in Util.iter_json_lines_file(self.json_path):
+                yield self._to_json_line_data(line)
+
+    def _build_index(self) -> "dict[str, JSONLineData | int]":
+        # lazy inputs backed by a file only keep byte offsets in memory, entries
+        # are re-read and validated on lookup. Later lines override earlier ones.
+        index: "dict[str, JSONLineData | int]" = {}
+        if self.__json_lines_data is None and self.json_path is not None:
+            for offset, line in Util.iter_json_lines_file_with_offsets(self.json_path):
+                index[self._to_json_line_data(line).name] = offset
+        else:
+            for json_line_data in self.iter_json_lines_data():
+                index[json_line_data.name] = json_line_data
+        return index
+
+    def get_json_line_data(self, name: str) -> "JSONLineData | None":
+        if self.__index is None:
+            self.__index = self._build_index()
+        entry = self.__index.get(name)
+        if isinstance(entry, int) and self.json_path is not None:
+            return self._to_json_line_data(
+                Util.read_json_line_at(self.json_path, entry)
             )
+        return entry  # type: ignore
 
     @property
     def stream_config(self) -> dict[str, object]:
-        return self.__stream_config
+        return getattr(self.__local, "stream_config", {})
 
     def set_stream_config(self, stream_config: dict[str, object]):
-        self.__stream_config = stream_config
+        self.__local.stream_config = stream_config
 
     def reset_stream_config(self):
-        self.__stream_config = {}
+        self.__local.stream_config = {}
 
 
 class Config(JSONConfigInput):
@@ -74,30 +124,65 @@ class Config(JSONConfigInput):
 
 
 class Catalog(JSONLinesConfigInput):
-    def __init__(self, json_data: str | list[dict[str, object]]) -> None:
-        super().__init__(json_data)
+    def __init__(
+        self, json_data: str | list[dict[str, object]], lazy: bool = False
+    ) -> None:
+        super().__init__(json_data, lazy)
 
 
 class State(JSONLinesConfigInput):
-    def __init__(self, json_data: str | list[dict[str, object]]) -> None:
-        super().__init__(json_data)
+    def __init__(
+        self, json_data: str | list[dict[str, object]], lazy: bool = False
+    ) -> None:
+        super().__init__(json_data, lazy)
+
+
+class RuntimeArgumentsMeta(type):
+    # arguments are kept per context, threads started by the SDK run in a copy
+    # of the context that started them.
+    @property
+    def config(cls) -> Config | None:
+        return cls._config.get()  # type: ignore
+
+    @config.setter
+    def config(cls, config: Config | None):
+        cls._config.set(config)  # type: ignore
+
+    @property
+    def catalog(cls) -> Catalog | None:
+        return cls._catalog.get()  # type: ignore
+
+    @catalog.setter
+    def catalog(cls, catalog: Catalog | None):
+        cls._catalog.set(catalog)  # type: ignore
+
+    @property
+    def state(cls) -> State | None:
+        return cls._state.get()  # type: ignore
+
+    @state.setter
+    def state(cls, state: State | None):
+        cls._state.set(state)  # type: ignore
 
 
-class RuntimeArguments:
-    config: Config | None = None
-    catalog: Catalog | None = None
-    state: State | None = None
+class RuntimeArguments(metaclass=RuntimeArgumentsMeta):
+    _config: ContextVar[Config | None] = ContextVar("config", default=None)
+    _catalog: ContextVar[Catalog | None] = ContextVar("catalog", default=None)
+    _state: ContextVar[State | None] = ContextVar("state", default=None)
 
     @staticmethod
     def setup(
         config: str | None = None,
         catalog: str | None = None,
         state: str | None = None,
+        lazy: bool = False,
     ):
         config = config if config != "" else None
         catalog = catalog if catalog != "" else None
         state = state if state != "" else None
 
         RuntimeArguments.config = Config(config) if config is not None else None
-        RuntimeArguments.catalog = Catalog(catalog) if catalog is not None else None
-        RuntimeArguments.state = State(state) if state is not None else None
+        RuntimeArguments.catalog = (
+            Catalog(catalog, lazy) if catalog is not None else None
+        )
+        RuntimeArguments.state = State(state, lazy) if state is not None else None
@@ -0,0 +1,32 @@
+import threading
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__values: dict[str, float] = {}
+
+    def increment(self, key: str, value: float = 1):
+        with self.__lock:
+            self.__values[key] = self.__values.get(key, 0) + value
+
+    def set(self, key: str, value: float):
+        with self.__lock:
+            self.__values[key] = value
+
+    def set_max(self, key: str, value: float):
+        with self.__lock:
+            if value > self.__values.get(key, value - 1):
+                self.__values[key] = value
+
+    def get(self, key: str, default: float = 0) -> float:
+        with self.__lock:
+            return self.__values.get(key, default)
+
+    def reset(self):
+        with self.__lock:
+            self.__values = {}
+
+    def to_dict(self) -> dict[str, float]:
+        with self.__lock:
+            return dict(sorted(self.__values.items()))
@@ -0,0 +1,130 @@
+import re
+
+
+def _nested_pattern(depth: int) -> bytes:
+    # a bracketed value with at most `depth` levels, re has no recursion.
+    inner = b"|" + _nested_pattern(depth - 1) if depth > 1 else b""
+    return rb'[\[{](?:[^"\[\]{}]++|"(?:[^"\\]++|\\.)*+"' + inner + rb")*+[\]}]"
+
+
+class JSONRecordsSplitter:
+    """
+    Splits a JSON document fed in chunks into JSON Lines without decoding it.
+    A top-level array yields one line per element, any other document yields a
+    single line. Array elements nested up to `max_fast_depth` levels are
+    matched by a single regular expression each; deeper elements, and elements
+    cut by a chunk boundary, fall back to scanning structural characters.
+    """
+
+    max_fast_depth = 4
+
+    # one complete array element and its separator.
+    __element = re.compile(
+        rb'((?:[^"\[\]{},]++|"(?:[^"\\]++|\\.)*+"|'
+        + _nested_pattern(max_fast_depth)
+        + rb")*+)([,\]])",
+        re.DOTALL,
+    )
+    # runs of non structural content (including complete strings) to skip over,
+    # possessive so an unterminated string at a chunk boundary fails in linear time.
+    __skip_top = re.compile(rb'(?:[^"\[\]{},]++|"(?:[^"\\]++|\\.)*+")*+', re.DOTALL)
+    __skip_nested = re.compile(rb'(?:[^"\[\]{}]++|"(?:[^"\\]++|\\.)*+")*+', re.DOTALL)
+    # raw newlines can not occur inside JSON strings, so turning them into
+    # spaces keeps records intact while making each a single line.
+    __newlines = bytes.maketrans(b"\r\n", b"  ")
+
+    def __init__(self) -> None:
+        self.__buffer = bytearray()
+        # scan state of an element the fast path could not match.
+        self.__position = 0
+        self.__depth = 0
+        self.__is_array: bool | None = None
+        self.__is_done = False
+
+    @staticmethod
+    def _to_line(record: "bytes | bytearray") -> "bytes | None":
+        record = bytes(record).strip()
+        if not record:
+            return None
+        return record.replace(b"\n", b"").replace(b"\r", b"") + b"\n"
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        if self.__is_done:
+            return []
+        if self.__is_array is None:
+            self.__buffer += chunk
+            stripped = self.__buffer.lstrip()
+            if not stripped:
+                self.__buffer.clear()
+                return []
+            self.__is_array = stripped[:1] == b"["
+            if not self.__is_array:
+                self.__buffer = bytearray(stripped)
+                return []
+            self.__buffer = bytearray(stripped[1:].translate(self.__newlines))
+        elif not self.__is_array:
+            self.__buffer += chunk
+            return []
+        else:
+            self.__buffer += chunk.translate(self.__newlines)
+        return self.__split()
+
+    def __split(self) -> list[bytes]:
+        lines: list[bytes] = []
+        buffer = self.__buffer
+        start = 0
+        while not self.__is_done:
+            if self.__position == 0:
+                match = self.__element.match(buffer, start)
+                if match is not None:
+                    if record := bytes(match.group(1)).strip():
+                        lines.append(record + b"\n")
+                    start = match.end()
+                    self.__is_done = match.group(2) == b"]"
+                    continue
+            if not self.__scan(buffer, start):
+                break
+            if record := bytes(buffer[start : start + self.__position - 1]).strip():
+                lines.append(record + b"\n")
+            start += self.__position
+            self.__position = 0
+        if self.__is_done:
+            buffer.clear()
+        else:
+            del buffer[:start]
+        return lines
+
+    def __scan(self, buffer: bytearray, start: int) -> bool:
+        """
+        Scans the element at `start` token by token, returns True once its
+        separator is found with `__position` just past it.
+        """
+        position = start + self.__position
+        while True:
+            skip = self.__skip_nested if self.__depth > 0 else self.__skip_top
+            position = skip.match(buffer, position).end()  # type: ignore
+            if position >= len(buffer) or buffer[position] == 0x22:  # '"'
+                # data ends within a scalar or a string, wait for more.
+                self.__position = position - start
+                return False
+            token = buffer[position]
+            position += 1
+            if token in b"[{":
+                self.__depth += 1
+            elif token in b"]}" and self.__depth > 0:
+                self.__depth -= 1
+            elif token in b",]":
+                self.__position = position - start
+                self.__is_done = token == 0x5D  # ']'
+                return True
+
+    def close(self) -> list[bytes]:
+        if self.__is_array is None:
+            return []
+        if not self.__is_array:
+            line = self._to_line(self.__buffer)
+            self.__buffer.clear()
+            return [line] if line is not None else []
+        if not self.__is_done:
+            raise ValueError("JSON array is incomplete.")
+        return []
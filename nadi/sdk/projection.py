@@ -0,0 +1,94 @@
+import re
+from typing import Any
+
+
+class Projection:
+    """
+    Keeps only the selected fields of records. A field is either a dotted path
+    (`id`, `customer.name`, `$.customer.name`) or any JSONPath expression.
+    Dotted paths are resolved with plain dict lookups and can be pushed down
+    into requests, other expressions go through jsonpath_ng.
+    """
+
+    __dotted_path = re.compile(r"^(\$\.)?[\w\-]+(\.[\w\-]+)*$")
+
+    def __init__(self, select: list[str]) -> None:
+        self.select = select
+        self.__paths: list[list[str]] = []
+        self.__expressions: list[Any] = []
+        # the root selects whole records, other fields add nothing then.
+        self.__is_root = False
+        for field in select:
+            if field.strip() == "$":
+                self.__is_root = True
+            elif self.__dotted_path.match(field):
+                self.__paths.append(field.removeprefix("$.").split("."))
+            else:
+                from jsonpath_ng import parse  # type: ignore
+
+                self.__expressions.append(parse(field))  # type: ignore
+
+    @property
+    def fields(self) -> "list[str] | None":
+        # dotted names to push into a request, None when any field is a JSONPath.
+        if self.__expressions or self.__is_root:
+            return None
+        return [".".join(path) for path in self.__paths]
+
+    def apply(self, record: Any) -> Any:
+        if not isinstance(record, dict) or self.__is_root:
+            return record
+        projected: dict[str, Any] = {}
+        for path in self.__paths:
+            value: Any = record
+            for key in path:
+                if not isinstance(value, dict) or key not in value:
+                    break
+                value = value[key]  # type: ignore
+            else:
+                target = projected
+                for key in path[:-1]:
+                    target = target.setdefault(key, {})
+                target[path[-1]] = value
+        for expression in self.__expressions:
+            for match in expression.find(record):
+                match.full_path.update_or_create(projected, match.value)
+        return projected
+
+    def apply_all(
+        self, json_data: "dict[str, object] | list[dict[str, object]]"
+    ) -> "dict[str, object] | list[dict[str, object]]":
+        if isinstance(json_data, dict):
+            return self.apply(json_data)
+        return [self.apply(record) for record in json_data]
+
+    def prune_schema(self, schema: dict[str, object]) -> dict[str, object]:
+        # JSONPath fields keep the schema of their top-level property untouched.
+        if self.__is_root:
+            return schema
+        paths = list(self.__paths)
+        for expression in self.__expressions:
+            top_level = re.match(r"^(\$\.)?([\w\-]+)", str(expression))
+            if top_level is None:
+                return schema
+            paths.append([top_level.group(2)])
+        return self.__prune(schema, paths)
+
+    def __prune(
+        self, schema: dict[str, object], paths: list[list[str]]
+    ) -> dict[str, object]:
+        properties = schema.get("properties")
+        if any(not path for path in paths) or not isinstance(properties, dict):
+            return schema
+        selected: dict[str, list[list[str]]] = {}
+        for path in paths:
+            selected.setdefault(path[0], []).append(path[1:])
+        pruned = dict(schema)
+        pruned["properties"] = {
+            key: self.__prune(properties[key], sub_paths)  # type: ignore
+            for key, sub_paths in selected.items()
+            if key in properties
+        }
+        if isinstance(required := schema.get("required"), list):
+            pruned["required"] = [key for key in required if key in selected]  # type: ignore
+        return pruned
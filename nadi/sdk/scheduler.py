@@ -0,0 +1,245 @@
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future
+from concurrent.futures import wait as futures_wait
+from contextvars import Context, copy_context
+from time import perf_counter
+from typing import Any, Callable
+from nadi.sdk.config import Configs
+from nadi.sdk.input import Catalog, Config, RuntimeArguments, State
+from nadi.sdk.source import Source
+
+
+class SchedulerIsShutdownError(Exception):
+    def __init__(self) -> None:
+        message = "Scheduler is shut down and cannot accept new jobs."
+        super().__init__(message)
+
+
+class SchedulerSourceNotRegisteredError(Exception):
+    def __init__(self, name: str) -> None:
+        message = f"Source '{name}' is not registered with the scheduler."
+        super().__init__(message)
+
+
+class SourceShare:
+    def __init__(
+        self, name: str, weight: float = 1.0, max_concurrency: int | None = None
+    ) -> None:
+        self.name = name
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        self.jobs: (
+            "deque[tuple[Future[Any], Context, Callable[..., Any], tuple[Any, ...]]]"
+        ) = deque()
+        self.running = 0
+        # worker time used so far divided by weight.
+        self.virtual_time = 0.0
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self.jobs) or self.running > 0
+
+    def can_run(self, default_concurrency: int | None = None) -> bool:
+        max_concurrency = (
+            self.max_concurrency
+            if self.max_concurrency is not None
+            else default_concurrency
+        )
+        return bool(self.jobs) and (
+            max_concurrency is None or self.running < max_concurrency
+        )
+
+
+class FairScheduler:
+    """
+    Shares a fixed pool of fetch workers between sources. The next job comes
+    from the source that used the least worker time per unit of weight, and a
+    source never runs more than `max_concurrency` jobs at once, so a slow
+    source cannot hold every worker. Without a cap, a source leaves one worker
+    free when several sources are registered.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max(max_workers, 1)
+        self.__condition = threading.Condition()
+        self.__shares: dict[str, SourceShare] = {}
+        self.__workers: list[threading.Thread] = []
+        self.__sources: list[threading.Thread] = []
+        self.__is_shutdown = False
+
+    def __enter__(self) -> "FairScheduler":
+        return self
+
+    def __exit__(self, *_: Any):
+        self.shutdown()
+
+    def register(
+        self, name: str, weight: float = 1.0, max_concurrency: int | None = None
+    ):
+        if weight <= 0:
+            raise ValueError("'weight' must be greater than 0")
+        with self.__condition:
+            if (share := self.__shares.get(name)) is None:
+                self.__shares[name] = SourceShare(name, weight, max_concurrency)
+            else:
+                share.weight = weight
+                share.max_concurrency = max_concurrency
+
+    def share(self, name: str) -> SourceShare:
+        with self.__condition:
+            if (share := self.__shares.get(name)) is None:
+                raise SchedulerSourceNotRegisteredError(name)
+            return share
+
+    def submit(self, name: str, func: Callable[..., Any], *args: Any) -> "Future[Any]":
+        future: "Future[Any]" = Future()
+        with self.__condition:
+            if self.__is_shutdown:
+                raise SchedulerIsShutdownError()
+            if (share := self.__shares.get(name)) is None:
+                raise SchedulerSourceNotRegisteredError(name)
+            if not share.is_active:
+                # an idle source rejoins at the others' pace instead of
+                # claiming the time it spent idle.
+                active = [
+                    other.virtual_time
+                    for other in self.__shares.values()
+                    if other.is_active
+                ]
+                if active:
+                    share.virtual_time = max(share.virtual_time, min(active))
+            share.jobs.append((future, copy_context(), func, args))
+            while len(self.__workers) < self.max_workers:
+                worker = threading.Thread(target=self.__work, daemon=True)
+                worker.start()
+                self.__workers.append(worker)
+            self.__condition.notify()
+        return future
+
+    def __next_job(self) -> "tuple[SourceShare, Any] | None":
+        default_concurrency = (
+            max(self.max_workers - 1, 1) if len(self.__shares) > 1 else None
+        )
+        shares = [
+            share
+            for share in self.__shares.values()
+            if share.can_run(default_concurrency)
+        ]
+        if not shares:
+            return None
+        share = min(shares, key=lambda share: share.virtual_time)
+        share.running += 1
+        return share, share.jobs.popleft()
+
+    def __work(self):
+        while True:
+            with self.__condition:
+                while (job := self.__next_job()) is None:
+                    if self.__is_shutdown:
+                        return
+                    self.__condition.wait()
+            share, (future, context, func, args) = job
+            started_at = perf_counter()
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(context.run(func, *args))
+                    except BaseException as err:
+                        future.set_exception(err)
+            finally:
+                with self.__condition:
+                    share.running -= 1
+                    share.virtual_time += (perf_counter() - started_at) / share.weight
+                    self.__condition.notify_all()
+
+    def executor(self, name: str) -> "FairSchedulerExecutor":
+        return FairSchedulerExecutor(self, name)
+
+    def fetch_all(
+        self,
+        source: Source,
+        config: Config | None = None,
+        catalog: Catalog | None = None,
+        state: State | None = None,
+        limit: int | None = None,
+        dry_run: bool = False,
+        weight: float = 1.0,
+        max_concurrency: int | None = None,
+    ) -> "Future[None]":
+        """
+        Runs `source.fetch_all` with its own configs and runtime arguments,
+        its fetch jobs run on the shared workers.
+        """
+        self.register(source.name, weight, max_concurrency)
+        context = Configs.new_context()
+        context.run(self.__setup, config, catalog, state)
+        future: "Future[None]" = Future()
+
+        def _run():
+            if not future.set_running_or_notify_cancel():
+                return
+            scheduler, source.scheduler = source.scheduler, self
+            try:
+                try:
+                    source.fetch_all(limit=limit, dry_run=dry_run)
+                finally:
+                    source.scheduler = scheduler
+            except BaseException as err:
+                future.set_exception(err)
+            else:
+                future.set_result(None)
+
+        thread = threading.Thread(target=context.run, args=(_run,))
+        with self.__condition:
+            if self.__is_shutdown:
+                raise SchedulerIsShutdownError()
+            self.__sources.append(thread)
+        thread.start()
+        return future
+
+    @staticmethod
+    def __setup(config: Config | None, catalog: Catalog | None, state: State | None):
+        RuntimeArguments.config = config
+        RuntimeArguments.catalog = catalog
+        RuntimeArguments.state = state
+
+    def shutdown(self, wait: bool = True):
+        with self.__condition:
+            sources = list(self.__sources)
+        if wait:
+            for thread in sources:
+                thread.join()
+        with self.__condition:
+            self.__is_shutdown = True
+            self.__condition.notify_all()
+            workers = list(self.__workers)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+
+class FairSchedulerExecutor(Executor):
+    """
+    Submits to a `FairScheduler` on behalf of one source, shutting it down only
+    waits for that source's jobs.
+    """
+
+    def __init__(self, scheduler: FairScheduler, name: str) -> None:
+        self.scheduler = scheduler
+        self.name = name
+        self.__futures: "list[Future[Any]]" = []
+
+    def submit(
+        self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any
+    ) -> "Future[Any]":
+        future = self.scheduler.submit(self.name, lambda: fn(*args, **kwargs))
+        self.__futures.append(future)
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        if cancel_futures:
+            for future in self.__futures:
+                future.cancel()
+        if wait:
+            futures_wait(self.__futures)
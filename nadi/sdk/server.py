@@ -0,0 +1,233 @@
+import os
+import socketserver
+import threading
+from typing import IO
+from nadi.sdk.codec import Codecs
+from nadi.sdk.input import (
+    Catalog,
+    Config,
+    JSONLineData,
+    JSONLinesConfigInput,
+    RuntimeArguments,
+    State,
+)
+from nadi.sdk.source import Source
+from nadi.sdk.stream import RestStream
+from nadi.sdk.util import Util
+
+
+class ServerPathNotAllowedError(Exception):
+    def __init__(self, path: str) -> None:
+        message = f"Path '{path}' is outside of the server's job directory."
+        super().__init__(message)
+
+
+class InlineOutput:
+    """
+    Wraps each JSON line written to it as `{"id": <job id>, "record": <line>}`
+    without decoding the record.
+    """
+
+    def __init__(self, output: IO[bytes], job_id: object) -> None:
+        self.output = output
+        self.prefix = b'{"id":' + Codecs.current().dumps(job_id) + b',"record":'
+
+    def write(self, data: bytes) -> int:
+        self.output.write(
+            b"".join(self.prefix + line + b"}\n" for line in data.split(b"\n") if line)
+        )
+        return len(data)
+
+    def flush(self):
+        self.output.flush()
+
+    def close(self):
+        pass
+
+
+class _JobLines(JSONLinesConfigInput):
+    """
+    Catalog or state of a job, stream configs naming files are confined too.
+    """
+
+    def __init__(
+        self,
+        json_data: "str | list[dict[str, object]]",
+        lazy: bool,
+        server: "Server",
+    ) -> None:
+        self.server = server
+        super().__init__(json_data, lazy)
+
+    def _to_json_line_data(self, line: "dict[str, object]") -> JSONLineData:
+        json_line_data = super()._to_json_line_data(line)
+        json_line_data.configs = self.server.confine_configs(json_line_data.configs)
+        return json_line_data
+
+
+class _JobCatalog(_JobLines, Catalog):
+    pass
+
+
+class _JobState(_JobLines, State):
+    pass
+
+
+class Server:
+    """
+    Runs fetch jobs, one JSON object per line, against a warm `Source`. Each job
+    brings its own config, catalog and state; jobs run one at a time since
+    they share the source's output and metrics. Files named by a job (config,
+    catalog, state and output) have to be inside `directory`, without one jobs
+    can only pass them inline. The same holds for `path_configs` set by a job.
+    """
+
+    path_configs = [
+        "nadi.adaptive.state_path",
+        "nadi.http.cassette.path",
+        "nadi.dedup.spill_directory",
+    ]
+
+    job_schema: dict[str, object] = {
+        "type": "object",
+        "properties": {
+            "stream": {"type": "string"},
+            "config": {"type": ["object", "string"]},
+            "catalog": {"type": ["array", "string"]},
+            "state": {"type": ["array", "string"]},
+            "limit": {"type": "integer", "minimum": 0},
+            "dry_run": {"type": "boolean"},
+            "lazy": {"type": "boolean"},
+            "output": {"type": "string"},
+        },
+    }
+
+    def __init__(
+        self,
+        source: Source,
+        config: "dict[str, object] | None" = None,
+        directory: str | None = None,
+    ):
+        self.source = source
+        # configs shared by all jobs, job configs take precedence.
+        self.config = dict({"nadi.http.pool_sessions": True}, **(config or {}))
+        self.directory = os.path.realpath(directory) if directory else None
+        self.__lock = threading.Lock()
+
+    def get_path(self, path: str) -> str:
+        # relative paths are resolved against the directory, symlinks included.
+        if self.directory is None:
+            raise ServerPathNotAllowedError(path)
+        real_path = os.path.realpath(os.path.join(self.directory, path))
+        if os.path.commonpath([self.directory, real_path]) != self.directory:
+            raise ServerPathNotAllowedError(path)
+        return real_path
+
+    def confine_configs(
+        self, configs: "dict[str, object] | None"
+    ) -> "dict[str, object] | None":
+        if configs is None:
+            return None
+        return dict(
+            configs,
+            **{
+                key: self.get_path(str(configs[key]))
+                for key in self.path_configs
+                if configs.get(key) is not None
+            },
+        )
+
+    def _job_input(self, job: "dict[str, object]", key: str) -> object:
+        value = job[key]
+        return self.get_path(value) if isinstance(value, str) else value
+
+    def _job_config(self, config: "str | dict[str, object]") -> Config:
+        job_config = Config(config)
+        job_config.json_data = dict(
+            self.config, **self.confine_configs(job_config.json_data)  # type: ignore
+        )
+        return job_config
+
+    def run_job(self, job: "dict[str, object]") -> "dict[str, object]":
+        Util.validate_against_schema(job, self.job_schema)
+        lazy = bool(job.get("lazy", False))
+        RuntimeArguments.config = self._job_config(
+            self._job_input(job, "config") if "config" in job else {}  # type: ignore
+        )
+        RuntimeArguments.catalog = (
+            _JobCatalog(self._job_input(job, "catalog"), lazy, self)  # type: ignore
+            if "catalog" in job
+            else None
+        )
+        RuntimeArguments.state = (
+            _JobState(self._job_input(job, "state"), lazy, self)  # type: ignore
+            if "state" in job
+            else None
+        )
+        self.source.metrics.reset()
+        if "stream" in job:
+            self.source.fetch_stream(
+                str(job["stream"]),
+                limit=job.get("limit"),  # type: ignore
+                dry_run=bool(job.get("dry_run", False)),
+            )
+        else:
+            self.source.fetch_all(
+                limit=job.get("limit"),  # type: ignore
+                dry_run=bool(job.get("dry_run", False)),
+            )
+        return {"status": "ok", "metrics": self.source.metrics.to_dict()}
+
+    def handle_line(self, line: bytes, output: IO[bytes]):
+        job_id = None
+        job_output: "IO[bytes] | InlineOutput | None" = None
+        with self.__lock:
+            try:
+                job = Codecs.current().loads(line)
+                job_id = job.get("id") if isinstance(job, dict) else None
+                job_output = (
+                    open(self.get_path(str(job["output"])), "ab")
+                    if isinstance(job, dict) and "output" in job
+                    else InlineOutput(output, job_id)
+                )
+                self.source.output = job_output  # type: ignore
+                result = self.run_job(job)
+            except Exception as err:
+                result = {"status": "error", "error": str(err)}
+            finally:
+                self.source.output = None
+                RuntimeArguments.config = None
+                RuntimeArguments.catalog = None
+                RuntimeArguments.state = None
+                if job_output is not None:
+                    job_output.close()
+            output.write(Codecs.current().dumps(dict({"id": job_id}, **result)))
+            output.write(b"\n")
+            output.flush()
+
+    def serve(self, input: IO[bytes], output: IO[bytes]):
+        for line in input:
+            if line.strip():
+                self.handle_line(line, output)
+
+    def serve_unix_socket(self, path: str):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                server.serve(self.rfile, self.wfile)  # type: ignore
+
+        try:
+            with socketserver.ThreadingUnixStreamServer(path, Handler) as unix_server:
+                # anyone able to connect can run jobs as this user.
+                os.chmod(path, 0o600)
+                unix_server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+            self.close()
+
+    def close(self):
+        for stream in self.source.supported_streams:
+            if isinstance(stream, RestStream):
+                stream.close_sessions()
@@ -1,7 +1,31 @@
+import contextlib
+import sys
+import threading
+from contextvars import copy_context
+from typing import IO, TYPE_CHECKING, Callable, Generator, Iterable
+from nadi.sdk.adaptive import AdaptiveControllers
 from nadi.sdk.auth import Auth, RestAuth
-from nadi.sdk.input import RuntimeArguments
+from nadi.sdk.buffer import BufferClosedError, RecordBuffer
+from nadi.sdk.codec import Codecs
+from nadi.sdk.dedup import BloomDeduplicator, Deduplicator, ExactDeduplicator
+from nadi.sdk.graph import StreamGraph, StreamGraphExecutor, StreamNode
+from nadi.sdk.input import JSONLineData, RuntimeArguments
+from nadi.sdk.metrics import Metrics
+from nadi.sdk.projection import Projection
 from nadi.sdk.stream import RestStream, Stream
-from nadi.sdk.config import Conf, Configs
+from nadi.sdk.config import (
+    BooleanConf,
+    Conf,
+    ConfigIsAlreadySupported,
+    Configs,
+    FloatConf,
+    IntConf,
+    StringConf,
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+    from nadi.sdk.scheduler import FairScheduler
 
 
 class CatalogInputIsRequiredError(Exception):
@@ -35,10 +59,23 @@ class EnforcedAuthIsNotSupported(Exception):
 
 
 class Source:
+    __active_pipelines = 0
+    __active_pipelines_lock = threading.Lock()
+
     def __init__(self, name: str) -> None:
         self.name = name
         self.supported_streams: list[Stream] = []
         self.supported_auths: list[Auth] = []
+        self.__supported_configs: list[Conf] = []
+        # supported configs are per context, see `Configs.new_context`.
+        self.__registered_configs: "list[Conf] | None" = None
+        self.metrics = Metrics()
+        # overrides the configured output, e.g. per job in `serve` mode.
+        self.output: "IO[bytes] | None" = None
+        # shares fetch workers with other sources when set, see `FairScheduler`.
+        self.scheduler: "FairScheduler | None" = None
+        self.__deduplicators: dict[str, Deduplicator] = {}
+        self.__deduplicators_lock = threading.Lock()
 
     @property
     def supported_configs(self) -> list[Conf]:
@@ -46,9 +83,71 @@ class Source:
 
     @supported_configs.setter
     def supported_configs(self, configs: list[Conf]):
-        for conf in configs:
-            Configs.add_supported_config(conf)
         self.__supported_configs = configs
+        self.__registered_configs = None
+
+    def register_configs(self):
+        # registration is deferred until a command actually needs configs, so
+        # constructing a source (and its auths) stays cheap at import time.
+        if self.__registered_configs is Configs.supported_configs:
+            return
+        for conf in self.sdk_configs():
+            with contextlib.suppress(ConfigIsAlreadySupported):
+                Configs.add_supported_config(conf)
+        for conf in self.__supported_configs:
+            if conf not in Configs.supported_configs:
+                Configs.add_supported_config(conf)
+        for auth in self.supported_auths:
+            for conf in auth.supported_configs():
+                with contextlib.suppress(ConfigIsAlreadySupported):
+                    Configs.add_supported_config(conf)
+        self.__registered_configs = Configs.supported_configs
+
+    def sdk_configs(self) -> list[Conf]:
+        return [
+            IntConf("nadi.fetch.max_workers", 1, is_secret=False),
+            IntConf("nadi.fetch.max_child_workers", 4, is_secret=False),
+            IntConf("nadi.output.buffer.max_records", 10000, is_secret=False),
+            IntConf("nadi.output.buffer.max_bytes", 64 * 1024 * 1024, is_secret=False),
+            StringConf(
+                "nadi.codec",
+                "stdlib",
+                is_secret=False,
+                valid_values=["auto", "stdlib", "orjson", "msgspec"],
+            ),
+            StringConf(
+                "nadi.dedup.mode",
+                "NONE",
+                is_secret=False,
+                valid_values=["NONE", "EXACT", "BLOOM"],
+            ),
+            IntConf("nadi.dedup.max_keys", 1_000_000, is_secret=False),
+            StringConf(
+                "nadi.dedup.spill_directory", None, is_secret=False, is_required=False
+            ),
+            IntConf("nadi.dedup.expected_records", 10_000_000, is_secret=False),
+            FloatConf("nadi.dedup.false_positive_rate", 0.001, is_secret=False),
+            StringConf(
+                "nadi.http.cassette.mode",
+                "NONE",
+                is_secret=False,
+                valid_values=["NONE", "RECORD", "REPLAY"],
+            ),
+            StringConf(
+                "nadi.http.cassette.path", None, is_secret=False, is_required=False
+            ),
+            BooleanConf("nadi.http.cassette.replay_latency", False, is_secret=False),
+            BooleanConf("nadi.http.pool_sessions", False, is_secret=False),
+            BooleanConf("nadi.adaptive.enabled", False, is_secret=False),
+            StringConf(
+                "nadi.adaptive.state_path", None, is_secret=False, is_required=False
+            ),
+            IntConf("nadi.adaptive.max_concurrency", 16, is_secret=False),
+            FloatConf("nadi.adaptive.target_latency", 1.0, is_secret=False),
+            IntConf("nadi.adaptive.max_retries", 5, is_secret=False),
+            IntConf("nadi.adaptive.min_page_size", 10, is_secret=False),
+            IntConf("nadi.adaptive.max_page_size", 1000, is_secret=False),
+        ]
 
     def get_stream(self, stream_name: str) -> Stream:
         for stream in self.supported_streams:
@@ -59,6 +158,7 @@ class Source:
         )
 
     def get_auth(self) -> Auth:
+        self.register_configs()
         if (
             enforce_method := Configs.get_or_error("nadi.auth.enforce_method")
         ) != "NONE":
@@ -72,38 +172,353 @@ class Source:
                 return auth
         raise AuthCannotBePerformed([auth.name for auth in self.supported_auths])
 
-    def _write(self, output: dict[str, object] | list[dict[str, object]]):
-        if Configs.get("nadi.output.to") == "stdout":
-            if isinstance(output, dict):
-                print(output)
-            else:
-                for line in output:
-                    print(line)
+    def _get_deduplicator(self, stream: Stream) -> Deduplicator | None:
+        if stream.primary_key is None:
+            return None
+        if (mode := Configs.get_or_error("nadi.dedup.mode")) == "NONE":
+            return None
+        with self.__deduplicators_lock:
+            if stream.name not in self.__deduplicators:
+                self.__deduplicators[stream.name] = (
+                    ExactDeduplicator(
+                        Configs.get_or_error("nadi.dedup.max_keys"),  # type: ignore
+                        Configs.get("nadi.dedup.spill_directory"),  # type: ignore
+                    )
+                    if mode == "EXACT"
+                    else BloomDeduplicator(
+                        Configs.get_or_error("nadi.dedup.expected_records"),  # type: ignore
+                        Configs.get_or_error("nadi.dedup.false_positive_rate"),  # type: ignore
+                    )
+                )
+            return self.__deduplicators[stream.name]
 
-    def fetch_all(self, limit: int | None = None, dry_run: bool = False):
-        if RuntimeArguments.catalog is None:
-            raise CatalogInputIsRequiredError()
+    def _deduplicate(
+        self,
+        stream: Stream,
+        deduplicator: Deduplicator | None,
+        output: dict[str, object] | list[dict[str, object]],
+    ) -> list[dict[str, object]]:
+        records = [output] if isinstance(output, dict) else output
+        if deduplicator is None:
+            return records
+        unique = []
+        keyless = 0
+        for record in records:
+            if (key := stream.get_primary_key(record)) is None:
+                keyless += 1
+                unique.append(record)
+            elif deduplicator.add(key):
+                unique.append(record)
+        if keyless:
+            self.metrics.increment(f"dedup.{stream.name}.keyless_records", keyless)
+        if duplicates := len(records) - len(unique):
+            self.metrics.increment("dedup.duplicates", duplicates)
+            self.metrics.increment(f"dedup.{stream.name}.duplicates", duplicates)
+        return unique
 
-        for catalog in RuntimeArguments.catalog.json_lines_data:
-            RuntimeArguments.catalog.set_stream_config(
-                catalog.configs if catalog.configs is not None else {}
+    def _close_deduplicators(self):
+        with self.__deduplicators_lock:
+            for deduplicator in self.__deduplicators.values():
+                deduplicator.close()
+            self.__deduplicators = {}
+
+    def _serialize(
+        self, output: dict[str, object] | list[dict[str, object]]
+    ) -> list[bytes]:
+        dumps = Codecs.current().dumps
+        records = [output] if isinstance(output, dict) else output
+        return [dumps(record) + b"\n" for record in records]
+
+    def _get_output(self) -> "IO[bytes]":
+        if self.output is not None:
+            return self.output
+        # raises ConfigValueInvalidError for anything but the supported "stdout".
+        Configs.get_or_error("nadi.output.to")
+        return sys.stdout.buffer
+
+    def _drain(self, buffer: RecordBuffer, errors: list[BaseException]):
+        try:
+            output = self._get_output()
+            while (line := buffer.get()) is not None:
+                output.write(line)
+            output.flush()
+        except BaseException as err:
+            errors.append(err)
+            buffer.abort()
+
+    def _run_job(
+        self,
+        job: Callable[[RecordBuffer], None],
+        buffer: RecordBuffer,
+        errors: list[BaseException],
+    ):
+        try:
+            job(buffer)
+        except BufferClosedError:
+            pass
+        except BaseException as err:
+            errors.append(err)
+            buffer.abort()
+
+    def _get_executor(self, max_workers: int) -> "Executor":
+        from concurrent.futures import ThreadPoolExecutor
+
+        if self.scheduler is not None:
+            return self.scheduler.executor(self.name)
+        return ThreadPoolExecutor(max_workers)
+
+    def _run_pipeline(self, jobs: Iterable[Callable[[RecordBuffer], None]]):
+        # fetch jobs run on a bounded worker pool and put serialized records in
+        # a bounded buffer, which a single writer thread drains to the output.
+        self.register_configs()
+        Codecs.select(str(Configs.get_or_error("nadi.codec")))
+        buffer = RecordBuffer(
+            int(Configs.get_or_error("nadi.output.buffer.max_records")),  # type: ignore
+            int(Configs.get_or_error("nadi.output.buffer.max_bytes")),  # type: ignore
+            self.metrics,
+        )
+        adaptive_controllers = None
+        if Configs.get_or_error("nadi.adaptive.enabled"):
+            adaptive_controllers = AdaptiveControllers.open(
+                self.metrics,
+                Configs.get("nadi.adaptive.state_path"),  # type: ignore
+                max_concurrency=Configs.get_or_error("nadi.adaptive.max_concurrency"),
+                target_latency=Configs.get_or_error("nadi.adaptive.target_latency"),
+                max_retries=Configs.get_or_error("nadi.adaptive.max_retries"),
+                min_page_size=Configs.get_or_error("nadi.adaptive.min_page_size"),
+                max_page_size=Configs.get_or_error("nadi.adaptive.max_page_size"),
             )
-            self.fetch_stream(catalog.name, limit=limit, dry_run=dry_run)
-            RuntimeArguments.catalog.reset_stream_config()
+        max_workers = max(int(Configs.get_or_error("nadi.fetch.max_workers")), 1)  # type: ignore
+        if self.scheduler is not None:
+            # the scheduler caps concurrency per source instead.
+            max_workers = self.scheduler.max_workers
+        slots = threading.BoundedSemaphore(max_workers)
+        errors: list[BaseException] = []
 
-    def fetch_stream(
+        with Source.__active_pipelines_lock:
+            Source.__active_pipelines += 1
+
+        # threads run in a copy of this context, so they see the same configs
+        # and runtime arguments.
+        writer = threading.Thread(
+            target=copy_context().run, args=(self._drain, buffer, errors)
+        )
+        writer.start()
+        try:
+            with self._get_executor(max_workers) as executor:
+                try:
+                    for job in jobs:
+                        slots.acquire()
+                        if errors:
+                            break
+                        executor.submit(
+                            copy_context().run, self._run_job, job, buffer, errors
+                        ).add_done_callback(lambda _: slots.release())
+                except BaseException:
+                    buffer.abort()
+                    raise
+        finally:
+            buffer.close()
+            writer.join()
+            self._close_deduplicators()
+            if adaptive_controllers is not None:
+                adaptive_controllers.close()
+            with Source.__active_pipelines_lock:
+                Source.__active_pipelines -= 1
+                # cassettes are shared by every source in the process.
+                if Source.__active_pipelines == 0:
+                    RestStream.close_cassettes()
+        if errors:
+            raise errors[0]
+
+    def _fetch_into(
         self,
+        buffer: RecordBuffer,
         stream_name: str,
         limit: int | None = None,
         dry_run: bool = False,
+        context: "dict[str, object] | None" = None,
+        select: "list[str] | None" = None,
     ):
         stream = self.get_stream(stream_name)
         auth = self.get_auth()
 
         if dry_run:
             if isinstance(stream, RestStream) and isinstance(auth, RestAuth):
-                stream.prepare_requests(auth=auth)
+                stream.prepare_requests(auth=auth, context=context, select=select)
+            return
+
+        # records have to be decoded to find duplicates, no passthrough then.
+        deduplicator = self._get_deduplicator(stream)
+        if deduplicator is None and stream.can_passthrough(select):
+            for line in stream.fetch_raw(auth, limit, context, select):
+                buffer.put(line, line.count(b"\n"))
             return
 
-        for data in stream.fetch(auth, limit):
-            self._write(data)
+        # one buffer item per fetched page, the buffer's per item cost is
+        # higher than encoding a record.
+        for data in self._fetch_pages(stream, auth, limit, context, select):
+            if lines := self._serialize(self._deduplicate(stream, deduplicator, data)):
+                buffer.put(b"".join(lines), len(lines))
+
+    def _fetch_pages(
+        self,
+        stream: Stream,
+        auth: Auth,
+        limit: int | None = None,
+        context: "dict[str, object] | None" = None,
+        select: "list[str] | None" = None,
+    ) -> Iterable[dict[str, object] | list[dict[str, object]]]:
+        return stream.fetch(auth, limit, context, select)
+
+    @contextlib.contextmanager
+    def _stream_configs(
+        self, stream_name: str, configs: "dict[str, object] | None"
+    ) -> Generator[None, None, None]:
+        if RuntimeArguments.catalog is not None:
+            RuntimeArguments.catalog.set_stream_config(
+                configs if configs is not None else {}
+            )
+        if RuntimeArguments.state is not None:
+            state = RuntimeArguments.state.get_json_line_data(stream_name)
+            RuntimeArguments.state.set_stream_config(
+                state.configs if state is not None and state.configs is not None else {}
+            )
+        try:
+            yield
+        finally:
+            if RuntimeArguments.catalog is not None:
+                RuntimeArguments.catalog.reset_stream_config()
+            if RuntimeArguments.state is not None:
+                RuntimeArguments.state.reset_stream_config()
+
+    def _fetch_catalog_entry(
+        self,
+        buffer: RecordBuffer,
+        catalog: JSONLineData,
+        limit: int | None = None,
+        dry_run: bool = False,
+    ):
+        with self._stream_configs(catalog.name, catalog.configs):
+            self._fetch_into(
+                buffer,
+                catalog.name,
+                limit=limit,
+                dry_run=dry_run,
+                select=catalog.select,
+            )
+
+    @staticmethod
+    def _collect_futures(
+        futures: "list[Future[None]]", wait: bool = False
+    ) -> "list[Future[None]]":
+        pending: "list[Future[None]]" = []
+        for future in futures:
+            if wait or future.done():
+                future.result()
+            else:
+                pending.append(future)
+        return pending
+
+    def _fetch_node(
+        self,
+        buffer: RecordBuffer,
+        node: StreamNode,
+        executor: StreamGraphExecutor,
+        limit: int | None = None,
+        dry_run: bool = False,
+        context: "dict[str, object] | None" = None,
+        depth: int = 0,
+    ):
+        with self._stream_configs(node.name, node.configs):
+            if not node.children:
+                self._fetch_into(
+                    buffer, node.name, limit, dry_run, context, node.select
+                )
+                return
+
+            stream = self.get_stream(node.name)
+            auth = self.get_auth()
+            if dry_run:
+                if isinstance(stream, RestStream) and isinstance(auth, RestAuth):
+                    stream.prepare_requests(auth=auth, context=context)
+                return
+
+            # children are scheduled as parent records arrive, without waiting
+            # for the parent stream to be fully fetched. Parents are fetched in
+            # full as bindings may use fields which are not selected.
+            projection = Projection(node.select) if node.select else None
+            deduplicator = self._get_deduplicator(stream)
+            futures: "list[Future[None]]" = []
+            for data in stream.fetch(auth, limit, context):
+                records = self._deduplicate(stream, deduplicator, data)
+                if node.emit:
+                    emitted = projection.apply_all(records) if projection else records
+                    for line in self._serialize(emitted):
+                        buffer.put(line)
+                for record in records:
+                    for child in node.children:
+                        if (child_context := child.bind(record, context)) is None:
+                            self.metrics.increment("graph.unbound_records")
+                            continue
+                        futures.append(
+                            executor.submit(
+                                depth,
+                                self._fetch_node,
+                                buffer,
+                                child,
+                                executor,
+                                limit,
+                                dry_run,
+                                child_context,
+                                depth + 1,
+                            )
+                        )
+                        self.metrics.increment("graph.child_fetches")
+                futures = self._collect_futures(futures)
+            self._collect_futures(futures, wait=True)
+
+    def fetch_all(self, limit: int | None = None, dry_run: bool = False):
+        if RuntimeArguments.catalog is None:
+            raise CatalogInputIsRequiredError()
+        self.register_configs()
+
+        catalog_input = RuntimeArguments.catalog
+        graph = StreamGraph(self.supported_streams)
+
+        def _jobs(
+            executor: StreamGraphExecutor,
+        ) -> Generator[Callable[[RecordBuffer], None], None, None]:
+            # independent streams start right away, streams linked through
+            # parents are collected and run as a graph once the catalog is read.
+            linked: list[JSONLineData] = []
+            for catalog in catalog_input.iter_json_lines_data():
+                if graph.is_linked(catalog.name):
+                    linked.append(catalog)
+                    continue
+                yield lambda buffer, catalog=catalog: self._fetch_catalog_entry(
+                    buffer, catalog, limit=limit, dry_run=dry_run
+                )
+            for node in graph.build(linked):
+                yield lambda buffer, node=node: self._fetch_node(
+                    buffer, node, executor, limit=limit, dry_run=dry_run
+                )
+
+        with StreamGraphExecutor(
+            int(Configs.get_or_error("nadi.fetch.max_child_workers"))  # type: ignore
+        ) as executor:
+            self._run_pipeline(_jobs(executor))
+
+    def fetch_stream(
+        self,
+        stream_name: str,
+        limit: int | None = None,
+        dry_run: bool = False,
+    ):
+        self._run_pipeline(
+            [
+                lambda buffer: self._fetch_into(
+                    buffer, stream_name, limit=limit, dry_run=dry_run
+                )
+            ]
+        )
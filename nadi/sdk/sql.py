@@ -0,0 +1,475 @@
+import importlib
+import re
+import threading
+from base64 import b64encode
+from contextlib import closing
+from contextvars import copy_context
+from datetime import date, time
+from decimal import Decimal
+from queue import Empty, Full, Queue
+from typing import Any, Generator, Iterable
+from uuid import uuid4
+from nadi.sdk.auth import Auth
+from nadi.sdk.config import (
+    BooleanConf,
+    Conf,
+    Configs,
+    ConfigTypeInvalidError,
+    IntConf,
+    StringConf,
+)
+from nadi.sdk.projection import Projection
+from nadi.sdk.source import Source
+from nadi.sdk.stream import RecordLimit, Stream
+
+
+class SqlColumnInvalidError(Exception):
+    def __init__(self, stream_name: str, column: str) -> None:
+        message = f"Stream '{stream_name}' has invalid column name '{column}'."
+        super().__init__(message)
+
+
+class SqlParamStyleNotSupportedError(Exception):
+    def __init__(self, paramstyle: str) -> None:
+        message = f"Driver paramstyle '{paramstyle}' is not supported."
+        super().__init__(message)
+
+
+class SqlQuery:
+    """
+    Collects query parameters, rendering placeholders in the driver's paramstyle.
+    """
+
+    def __init__(self, paramstyle: str) -> None:
+        self.paramstyle = paramstyle
+        self.sql = ""
+        self.__params: list[object] = []
+
+    def param(self, value: object) -> str:
+        self.__params.append(value)
+        index = len(self.__params)
+        match self.paramstyle:
+            case "qmark":
+                return "?"
+            case "format":
+                return "%s"
+            case "numeric":
+                return f":{index}"
+            case "named":
+                return f":p{index}"
+            case "pyformat":
+                return f"%(p{index})s"
+        raise SqlParamStyleNotSupportedError(self.paramstyle)
+
+    @property
+    def params(self) -> "list[object] | dict[str, object]":
+        if self.paramstyle in ["named", "pyformat"]:
+            return {f"p{i}": value for i, value in enumerate(self.__params, 1)}
+        return self.__params
+
+
+class SqlAuth(Auth):
+    """
+    Connects with a DB-API 2.0 driver. `nadi.sql.connection` is passed to the
+    driver's `connect`, as keyword arguments when it is an object.
+    """
+
+    def __init__(self) -> None:
+        super().__init__("SQL")
+
+    def supported_configs(self) -> list[Conf]:
+        return super().supported_configs() + [
+            StringConf("nadi.sql.driver", "sqlite3", is_secret=False),
+            StringConf("nadi.sql.connection", None),
+        ]
+
+    @property
+    def driver(self) -> str:
+        return str(Configs.get_or_error("nadi.sql.driver"))
+
+    @property
+    def paramstyle(self) -> str:
+        return importlib.import_module(self.driver).paramstyle
+
+    def connect(self) -> Any:
+        module = importlib.import_module(self.driver)
+        connection = Configs.get_or_error("nadi.sql.connection")
+        if isinstance(connection, dict):
+            return module.connect(**connection)
+        return module.connect(connection)
+
+    def cursor(self, connection: Any, server_side: bool = True) -> Any:
+        # drivers buffer the whole result on the client unless asked otherwise,
+        # sqlite3 steps through rows lazily already.
+        if server_side and self.driver in ["psycopg", "psycopg2"]:
+            return connection.cursor(name=f"nadi_{uuid4().hex}")
+        if server_side and self.driver in ["pymysql", "MySQLdb"]:
+            return connection.cursor(
+                importlib.import_module(f"{self.driver}.cursors").SSCursor
+            )
+        return connection.cursor()
+
+
+class SqlStream(Stream):
+    """
+    Records of `query`, fetched in batches ordered by `key_column`. Fetching
+    resumes after `nadi.sql.after` when set (keyset pagination), and with
+    `nadi.sql.parallelism` above one, ranges of `split_column` are fetched
+    concurrently on separate connections, in no particular order. Ordered
+    fetches report the last key fetched as the `sql.<stream>.last_key` metric,
+    the `nadi.sql.after` to resume from in the next run.
+    """
+
+    column_pattern = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+    json_types = frozenset([str, int, float, bool, type(None)])
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        query: str,
+        key_column: str | None = None,
+        output_json_schema: "str | dict[str, object] | None" = None,
+        group: str | None = None,
+        tags: list[str] | None = None,
+        split_column: str | None = None,
+        primary_key: str | None = None,
+    ) -> None:
+        super().__init__(
+            name, description, output_json_schema, group, tags, primary_key=primary_key
+        )
+        self.query = query
+        self.key_column = self._validate_column(key_column)
+        self.split_column = self._validate_column(split_column)
+
+    def _validate_column(self, column: str | None) -> str | None:
+        if column is not None and not self.column_pattern.match(column):
+            raise SqlColumnInvalidError(self.name, column)
+        return column
+
+    def required_configs(self) -> set[str]:
+        return set()
+
+    @staticmethod
+    def to_json_value(value: object) -> object:
+        """
+        Converts a column value the codecs can not encode: binary data to base64,
+        decimals to their exact text and temporal values to ISO 8601.
+        """
+        if value is None or isinstance(value, (str, int, float)):
+            return value
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return b64encode(value).decode("ascii")
+        if isinstance(value, (date, time)):
+            return value.isoformat()
+        if isinstance(value, (list, tuple)):
+            return [SqlStream.to_json_value(item) for item in value]
+        if isinstance(value, dict):
+            return {key: SqlStream.to_json_value(item) for key, item in value.items()}
+        return str(value)
+
+    def to_record(self, names: tuple[str, ...], row: Any) -> dict[str, object]:
+        json_types = self.json_types
+        if all(type(value) in json_types for value in row):
+            return dict(zip(names, row))
+        return dict(zip(names, map(self.to_json_value, row)))
+
+    def can_push_down(self, projection: Projection | None) -> bool:
+        return (
+            projection is not None
+            and projection.fields is not None
+            and all(self.column_pattern.match(field) for field in projection.fields)
+        )
+
+    def build_query(
+        self,
+        paramstyle: str,
+        columns: "list[str] | None" = None,
+        after: object | None = None,
+        lower: object | None = None,
+        upper: object | None = None,
+        include_upper: bool = False,
+        include_null: bool = False,
+    ) -> SqlQuery:
+        query = SqlQuery(paramstyle)
+        conditions = []
+        if after is not None and self.key_column is not None:
+            conditions.append(f"{self.key_column} > {query.param(after)}")
+        split_conditions = []
+        if lower is not None:
+            split_conditions.append(f"{self.split_column} >= {query.param(lower)}")
+        if upper is not None:
+            operator = "<=" if include_upper else "<"
+            split_conditions.append(
+                f"{self.split_column} {operator} {query.param(upper)}"
+            )
+        if split_conditions and include_null:
+            # rows without a split value belong to no range, the first one takes them.
+            conditions.append(
+                f"({' AND '.join(split_conditions)} OR {self.split_column} IS NULL)"
+            )
+        else:
+            conditions.extend(split_conditions)
+        query.sql = (
+            f"SELECT {', '.join(columns) if columns else '*'} "
+            f"FROM ({self.query}) nadi_query"
+            + (f" WHERE {' AND '.join(conditions)}" if conditions else "")
+            + (f" ORDER BY {self.key_column}" if self.key_column is not None else "")
+        )
+        return query
+
+    def get_after(self, auth: SqlAuth) -> object | None:
+        after = Configs.get("nadi.sql.after")
+        if not isinstance(after, str) or self.key_column is None:
+            return after
+        # configs from the environment or command line are text, which most
+        # databases never compare as greater than a number. A server-side cursor
+        # only transfers the first key, its type is the key column's type.
+        with closing(auth.connect()) as connection:
+            with closing(auth.cursor(connection)) as cursor:
+                cursor.execute(
+                    f"SELECT {self.key_column} FROM ({self.query}) nadi_query "
+                    f"WHERE {self.key_column} IS NOT NULL"
+                )
+                row = cursor.fetchone()
+        key = row[0] if row is not None else None
+        if isinstance(key, (int, float, Decimal)) and not isinstance(key, bool):
+            try:
+                return type(key)(after)
+            except (ArithmeticError, ValueError) as err:
+                raise ConfigTypeInvalidError(
+                    "nadi.sql.after", type(after), type(key)
+                ) from err
+        return after
+
+    def get_split_ranges(
+        self, auth: SqlAuth, parallelism: int, after: object | None = None
+    ) -> "list[tuple[object, object, bool]]":
+        query = SqlQuery(auth.paramstyle)
+        where = (
+            f" WHERE {self.key_column} > {query.param(after)}"
+            if after is not None and self.key_column is not None
+            else ""
+        )
+        with closing(auth.connect()) as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute(
+                    f"SELECT MIN({self.split_column}), MAX({self.split_column}) "
+                    f"FROM ({self.query}) nadi_query{where}",
+                    query.params,
+                )
+                lower, upper = cursor.fetchone()
+        if not isinstance(lower, (int, float)) or not isinstance(upper, (int, float)):
+            return [(None, None, False)]
+        step = (upper - lower) / parallelism
+        if isinstance(lower, int) and isinstance(upper, int):
+            step = max(-(-(upper - lower + 1) // parallelism), 1)
+        bounds = [
+            lower + step * i for i in range(parallelism) if lower + step * i <= upper
+        ]
+        return [
+            (
+                bound,
+                bounds[i + 1] if i + 1 < len(bounds) else upper,
+                i + 1 == len(bounds),
+            )
+            for i, bound in enumerate(bounds)
+        ]
+
+    def fetch_batches(
+        self,
+        auth: SqlAuth,
+        query: SqlQuery,
+        batch_size: int,
+        server_side: bool = True,
+        record_limit: RecordLimit | None = None,
+    ) -> Generator[list[dict[str, object]], None, None]:
+        record_limit = record_limit if record_limit is not None else RecordLimit()
+        with closing(auth.connect()) as connection:
+            with closing(auth.cursor(connection, server_side)) as cursor:
+                cursor.execute(query.sql, query.params)
+                names: tuple[str, ...] | None = None
+                while not record_limit.is_reached:
+                    size = batch_size
+                    if record_limit.remaining is not None:
+                        size = min(size, record_limit.remaining)
+                    if not (rows := cursor.fetchmany(size)):
+                        return
+                    # server-side cursors only describe columns after a fetch.
+                    if names is None:
+                        names = tuple(column[0] for column in cursor.description)
+                    yield record_limit.take(  # type: ignore
+                        [self.to_record(names, row) for row in rows]
+                    )
+
+    def _fetch_parallel(
+        self,
+        auth: SqlAuth,
+        queries: list[SqlQuery],
+        batch_size: int,
+        server_side: bool,
+        record_limit: RecordLimit | None = None,
+    ) -> Generator[list[dict[str, object]], None, None]:
+        record_limit = record_limit if record_limit is not None else RecordLimit()
+        batches: "Queue[object]" = Queue(maxsize=len(queries) * 2)
+        stop = threading.Event()
+        done = object()
+
+        def _put(item: object):
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return
+                except Full:
+                    continue
+
+        def _produce(query: SqlQuery):
+            try:
+                for batch in self.fetch_batches(auth, query, batch_size, server_side):
+                    _put(batch)
+                    if stop.is_set():
+                        return
+            except BaseException as err:
+                _put(err)
+            finally:
+                _put(done)
+
+        threads = [
+            threading.Thread(target=copy_context().run, args=(_produce, query))
+            for query in queries
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            remaining = len(threads)
+            while remaining > 0:
+                try:
+                    item = batches.get(timeout=0.1)
+                except Empty:
+                    continue
+                if item is done:
+                    remaining -= 1
+                elif isinstance(item, BaseException):
+                    raise item
+                else:
+                    yield record_limit.take(item)  # type: ignore
+                    if record_limit.is_reached:
+                        return
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def fetch(
+        self,
+        auth: Auth,
+        limit: int | None = None,
+        context: "dict[str, object] | None" = None,
+        select: "list[str] | None" = None,
+    ) -> Generator[dict[str, object] | list[dict[str, object]], None, None]:
+        for records, _ in self.fetch_with_keys(auth, limit, context, select):
+            yield records
+
+    def fetch_with_keys(
+        self,
+        auth: Auth,
+        limit: int | None = None,
+        context: "dict[str, object] | None" = None,
+        select: "list[str] | None" = None,
+    ) -> Generator[tuple[list[dict[str, object]], object | None], None, None]:
+        """
+        Fetches like `fetch`, yielding each batch with the last key fetched so
+        far, None when the fetch is unordered.
+        """
+        if not isinstance(auth, SqlAuth):
+            raise TypeError("Provided 'auth' argument must be of type 'SqlAuth'")
+
+        record_limit = RecordLimit(limit)
+        batch_size = max(int(Configs.get_or_error("nadi.sql.batch_size")), 1)  # type: ignore
+        server_side = bool(Configs.get_or_error("nadi.sql.server_side_cursor"))
+        parallelism = max(int(Configs.get_or_error("nadi.sql.parallelism")), 1)  # type: ignore
+        after = self.get_after(auth)
+        # keys of unordered records are no resume point.
+        ordered = parallelism == 1 or self.split_column is None
+        track_key = ordered and self.key_column is not None
+        last_key = None
+
+        projection = Projection(select) if select else None
+        pushed_down = self.can_push_down(projection)
+        columns = projection.fields if pushed_down else None  # type: ignore
+        if columns is not None and track_key and self.key_column not in columns:
+            # selected along to track the key, the projection drops it again.
+            columns = columns + [self.key_column]  # type: ignore
+            pushed_down = False
+        output_json_schema = self.get_output_json_schema(projection)
+
+        if not ordered:
+            queries = [
+                self.build_query(
+                    auth.paramstyle, columns, after, lower, upper, last, i == 0
+                )
+                for i, (lower, upper, last) in enumerate(
+                    self.get_split_ranges(auth, parallelism, after)
+                )
+            ]
+            batches = self._fetch_parallel(
+                auth, queries, batch_size, server_side, record_limit
+            )
+        else:
+            query = self.build_query(auth.paramstyle, columns, after)
+            batches = self.fetch_batches(
+                auth, query, batch_size, server_side, record_limit
+            )
+
+        with closing(batches):
+            for records in batches:
+                if track_key and records:
+                    last_key = records[-1].get(self.key_column)  # type: ignore
+                if projection is not None and not pushed_down:
+                    records = projection.apply_all(records)
+                self.validate_schema(records, output_json_schema)
+                yield records, last_key
+                if record_limit.is_reached:
+                    return
+
+    def to_dict(self) -> dict[str, object]:
+        return dict(
+            super().to_dict(),
+            query=self.query,
+            key_column=self.key_column,
+            split_column=self.split_column,
+        )
+
+
+class SqlSource(Source):
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.supported_auths = [SqlAuth()]
+
+    def sdk_configs(self) -> list[Conf]:
+        return super().sdk_configs() + [
+            IntConf("nadi.sql.batch_size", 1000, is_secret=False),
+            IntConf("nadi.sql.parallelism", 1, is_secret=False),
+            BooleanConf("nadi.sql.server_side_cursor", True, is_secret=False),
+            StringConf("nadi.sql.after", None, is_secret=False, is_required=False),
+        ]
+
+    def get_auth(self) -> Auth:
+        self.register_configs()
+        return self.supported_auths[0]
+
+    def _fetch_pages(
+        self,
+        stream: Stream,
+        auth: Auth,
+        limit: int | None = None,
+        context: "dict[str, object] | None" = None,
+        select: "list[str] | None" = None,
+    ) -> Iterable[dict[str, object] | list[dict[str, object]]]:
+        if not isinstance(stream, SqlStream):
+            yield from super()._fetch_pages(stream, auth, limit, context, select)
+            return
+        for records, last_key in stream.fetch_with_keys(auth, limit, context, select):
+            if last_key is not None:
+                self.metrics.set(f"sql.{stream.name}.last_key", last_key)  # type: ignore
+            yield records
@@ -1,11 +1,20 @@
+import sys
+import threading
 from abc import abstractmethod
-from typing import Generator
+from contextlib import closing, contextmanager
+from typing import TYPE_CHECKING, Generator
+from urllib.parse import quote, urlsplit
+from nadi.sdk.adaptive import AdaptiveController, AdaptiveControllers
 from nadi.sdk.auth import Auth, RestAuth
+from nadi.sdk.codec import Codecs, StdlibCodec
 from nadi.sdk.config import Configs
+from nadi.sdk.passthrough import JSONRecordsSplitter
+from nadi.sdk.projection import Projection
 from nadi.sdk.util import Util
 from copy import deepcopy
-from requests import Response, Request, Session
-from requests.exceptions import ChunkedEncodingError
+
+if TYPE_CHECKING:
+    from requests import Response, Request, Session
 
 
 class StreamDoesNotHaveOutputSchemaError(Exception):
@@ -16,6 +25,12 @@ class StreamDoesNotHaveOutputSchemaError(Exception):
         super().__init__(message)
 
 
+class StreamDoesNotHavePrimaryKeyError(Exception):
+    def __init__(self, stream_name: str) -> None:
+        message = f"Stream '{stream_name}' does not have primary_key defined."
+        super().__init__(message)
+
+
 class StreamMissingArgumentConfigMapError(Exception):
     def __init__(self, stream_name: str, argument: str) -> None:
         message = f"Stream '{stream_name}' does not have 'argument_config_map' entry for {argument}."
@@ -23,7 +38,7 @@ class StreamMissingArgumentConfigMapError(Exception):
 
 
 class StreamResponseStatusInvalid(Exception):
-    def __init__(self, stream_name: str, response: Response) -> None:
+    def __init__(self, stream_name: str, response: "Response") -> None:
         message = f"Stream '{stream_name}' has invalid response. [Status '{response.status_code} - {response.reason}' for url '{response.url}']"
         super().__init__(message)
 
@@ -34,6 +49,27 @@ class StreamResponseContentInvalid(Exception):
         super().__init__(message)
 
 
+class RecordLimit:
+    def __init__(self, limit: int | None = None) -> None:
+        self.remaining = limit
+
+    @property
+    def is_reached(self) -> bool:
+        return self.remaining is not None and self.remaining <= 0
+
+    def take(
+        self, json_data: "dict[str, object] | list[dict[str, object]]"
+    ) -> "dict[str, object] | list[dict[str, object]]":
+        if self.remaining is None:
+            return json_data
+        if isinstance(json_data, dict):
+            self.remaining -= 1
+            return json_data
+        json_data = json_data[: self.remaining]
+        self.remaining -= len(json_data)
+        return json_data
+
+
 class ConfigMap:
     def __init__(
         self, short_key: str, config_key: str, is_required: bool = True
@@ -51,6 +87,9 @@ class Stream:
         output_json_schema: "str | dict[str, object] | None" = None,
         group: str | None = None,
         tags: list[str] | None = None,
+        parent: str | None = None,
+        parent_bindings: "dict[str, str] | None" = None,
+        primary_key: str | None = None,
     ) -> None:
         self.name = name
         self.description = description
@@ -61,17 +100,65 @@ class Stream:
         )
         self.tags = tags if tags is not None else []
         self.group = group
+        # placeholder -> JSONPath on a parent record, bound into request templates.
+        self.parent = parent
+        self.parent_bindings = parent_bindings if parent_bindings is not None else {}
+        self.primary_key = primary_key
+        # pruned schemas are reused so validators cached per schema stay valid.
+        self.__pruned_schemas: "dict[tuple[str, ...], dict[str, object]]" = {}
+
+    def get_primary_key(self, record: object) -> bytes | None:
+        if self.primary_key is None:
+            raise StreamDoesNotHavePrimaryKeyError(self.name)
+        # None when the record has no key, such records are never duplicates.
+        if not (values := Util.filter_records_by_json_path(record, self.primary_key)):
+            return None
+        return Codecs.current().dumps(values)
 
-    def _replace_arguments_with_value(self, fmt_string: str) -> str:
+    def _replace_arguments_with_value(
+        self,
+        fmt_string: str,
+        context: "dict[str, object] | None" = None,
+        quote_context: bool = False,
+    ) -> str:
+        # parent record values are quoted in urls so they stay a single segment.
+        context = context if context is not None else {}
         format_args = Util.extract_format_args_from_string(fmt_string)
-        format_dict = {key: Configs.get_or_error(key) for key in format_args}
+        format_dict = {
+            key: (
+                (quote(str(context[key]), safe="") if quote_context else context[key])
+                if key in context
+                else Configs.get_or_error(key)
+            )
+            for key in format_args
+        }
         return fmt_string.format(**format_dict)
 
-    def validate_schema(self, json_data: "dict[str, object] | list[dict[str, object]]"):
-        if self.output_json_schema is not None:
-            Util.validate_against_schema(json_data, self.output_json_schema)
-        if Configs.get_or_error("nadi.output.enable_schema_validation"):
+    def validate_schema(
+        self,
+        json_data: "dict[str, object] | list[dict[str, object]]",
+        output_json_schema: "dict[str, object] | None" = None,
+    ):
+        if not Configs.get_or_error("nadi.output.enable_schema_validation"):
+            return
+        schema = output_json_schema or self.output_json_schema
+        if schema is None:
             raise StreamDoesNotHaveOutputSchemaError(self.name)
+        validator = Util.get_schema_validator(schema)
+        for record in [json_data] if isinstance(json_data, dict) else json_data:
+            validator.validate(record)
+
+    def get_output_json_schema(
+        self, projection: Projection | None = None
+    ) -> "dict[str, object] | None":
+        if projection is None or self.output_json_schema is None:
+            return self.output_json_schema
+        key = tuple(projection.select)
+        if key not in self.__pruned_schemas:
+            self.__pruned_schemas[key] = projection.prune_schema(
+                self.output_json_schema
+            )
+        return self.__pruned_schemas[key]
 
     def discover(self) -> dict[str, object]:
         return {"name": self.name}
@@ -84,75 +171,348 @@ class Stream:
 
     @abstractmethod
     def fetch(
-        self, auth: Auth, limit: int | None = None
+        self,
+        auth: Auth,
+        limit: int | None = None,
+        context: "dict[str, object] | None" = None,
+        select: "list[str] | None" = None,
     ) -> Generator[dict[str, object] | list[dict[str, object]], None, None]:
         raise NotImplementedError(
             "'fetch' method has to be implemented by child class."
         )
 
+    def can_passthrough(self, select: "list[str] | None" = None) -> bool:
+        return False
+
+    def fetch_raw(
+        self,
+        auth: Auth,
+        limit: int | None = None,
+        context: "dict[str, object] | None" = None,
+        select: "list[str] | None" = None,
+    ) -> Generator[bytes, None, None]:
+        raise NotImplementedError(
+            "'fetch_raw' method has to be implemented by child class."
+        )
+
     def to_dict(self) -> dict[str, object]:
-        return {"name": self.name, "description": self.description}
+        return {
+            "name": self.name,
+            "description": self.description,
+            "parent": self.parent,
+        }
 
 
 class RestStream(Stream):
+    # paths whose matches are the elements of a top-level array (or the whole
+    # document otherwise), which is what the passthrough splitter emits.
+    passthrough_records_paths = [None, "$[*]"]
+
     def __init__(
         self,
         name: str,
         description: str,
-        request: Request,
+        request: "Request",
         output_json_schema: "str | dict[str, object] | None" = None,
         group: str | None = None,
         tags: list[str] | None = None,
+        records_path: str | None = None,
+        passthrough: bool = False,
+        chunk_size: int = 64 * 1024,
+        parent: str | None = None,
+        parent_bindings: "dict[str, str] | None" = None,
+        select_param: str | None = None,
+        select_separator: str = ",",
+        page_size_param: str | None = None,
+        primary_key: str | None = None,
     ) -> None:
-        super().__init__(name, description, output_json_schema, group, tags)
+        super().__init__(
+            name,
+            description,
+            output_json_schema,
+            group,
+            tags,
+            parent,
+            parent_bindings,
+            primary_key,
+        )
         self.original_request = request
+        self.records_path = records_path
+        self.passthrough = passthrough
+        self.chunk_size = chunk_size
+        # request parameter taking a list of fields, e.g. `fields=id,name`.
+        self.select_param = select_param
+        self.select_separator = select_separator
+        # request parameter for page size, lowered to the records still needed.
+        self.page_size_param = page_size_param
+        # idle sessions kept between fetches when `nadi.http.pool_sessions` is set.
+        self.__sessions: "list[Session]" = []
+        self.__sessions_lock = threading.Lock()
 
-    def prepare_requests(self, auth: RestAuth) -> Request:
+    def can_push_down(self, projection: Projection | None) -> bool:
+        return (
+            projection is not None
+            and self.select_param is not None
+            and projection.fields is not None
+        )
+
+    def prepare_requests(
+        self,
+        auth: RestAuth,
+        context: "dict[str, object] | None" = None,
+        select: "list[str] | None" = None,
+    ) -> "Request":
         request = deepcopy(self.original_request)
-        request.url = self._replace_arguments_with_value(request.url)
+        request.url = self._replace_arguments_with_value(
+            request.url, context, quote_context=True
+        )
         for key in request.params:
             request.params[key] = self._replace_arguments_with_value(
-                request.params[key]
+                request.params[key], context
             )
 
         for key in request.headers:
             request.headers[key] = self._replace_arguments_with_value(
-                request.headers[key]
+                request.headers[key], context
+            )
+        projection = Projection(select) if select else None
+        if self.can_push_down(projection):
+            request.params[self.select_param] = self.select_separator.join(
+                projection.fields  # type: ignore
             )
         request = auth.prepare_request(request)
         return request
 
-    def fetch(
-        self, auth: Auth, limit: int | None = None
-    ) -> Generator[dict[str, object] | list[dict[str, object]], None, None]:
+    def extract_records(
+        self, json_response: "dict[str, object] | list[dict[str, object]]"
+    ) -> "dict[str, object] | list[dict[str, object]]":
+        if self.records_path is None:
+            return json_response
+        return Util.filter_records_by_json_path(json_response, self.records_path)
+
+    def can_passthrough(self, select: "list[str] | None" = None) -> bool:
+        # raw bodies are only forwarded when nothing would inspect the records,
+        # streams opting in must paginate without reading the response body.
+        # compiled codecs decode and re-encode faster than the splitter runs.
+        return (
+            self.passthrough
+            and Codecs.current().name == StdlibCodec.name
+            and self.records_path in self.passthrough_records_paths
+            and (not select or self.can_push_down(Projection(select)))
+            and not Configs.get_or_error("nadi.output.enable_schema_validation")
+        )
+
+    def get_adaptive_controller(
+        self, request: "Request"
+    ) -> "AdaptiveController | None":
+        if not Configs.get_or_error("nadi.adaptive.enabled"):
+            return None
+        return AdaptiveControllers.get(urlsplit(request.url).netloc)
+
+    def _adapt_page_size(
+        self, request: "Request", controller: "AdaptiveController | None"
+    ) -> int | None:
+        if controller is None or self.page_size_param is None:
+            return None
+        try:
+            default = int(request.params.get(self.page_size_param))  # type: ignore
+        except (TypeError, ValueError):
+            return None
+        page_size = controller.get_page_size(self.name, default)
+        request.params[self.page_size_param] = str(page_size)
+        return page_size
+
+    def _limit_page_size(self, request: "Request", record_limit: RecordLimit) -> bool:
+        """
+        Lowers the page size to the remaining records, returns True when it did.
+        """
+        if self.page_size_param is None or record_limit.remaining is None:
+            return False
+        page_size = request.params.get(self.page_size_param)
+        try:
+            if int(page_size) <= record_limit.remaining:  # type: ignore
+                return False
+        except (TypeError, ValueError):
+            pass
+        request.params[self.page_size_param] = str(record_limit.remaining)
+        return True
+
+    def create_session(self) -> "Session":
+        from requests import Session
+
+        session = Session()
+        if (mode := Configs.get_or_error("nadi.http.cassette.mode")) == "NONE":
+            return session
+
+        from nadi.sdk.cassette import Cassette, RecordingAdapter, ReplayAdapter
+
+        cassette = Cassette.open(str(Configs.get_or_error("nadi.http.cassette.path")))
+        adapter = (
+            RecordingAdapter(cassette)
+            if mode == "RECORD"
+            else ReplayAdapter(
+                cassette,
+                bool(Configs.get_or_error("nadi.http.cassette.replay_latency")),
+            )
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    @contextmanager
+    def get_session(self) -> "Generator[Session, None, None]":
+        if not Configs.get_or_error("nadi.http.pool_sessions") or (
+            Configs.get_or_error("nadi.http.cassette.mode") != "NONE"
+        ):
+            with self.create_session() as session:
+                yield session
+            return
+
+        with self.__sessions_lock:
+            session = self.__sessions.pop() if self.__sessions else None
+        if session is None:
+            session = self.create_session()
+        reusable = False
+        try:
+            yield session
+            reusable = True
+        except GeneratorExit:
+            # fetch stopped early, e.g. once the record limit was reached.
+            reusable = True
+            raise
+        finally:
+            if reusable:
+                # cookies are not carried over to other jobs using the session.
+                session.cookies.clear()
+                with self.__sessions_lock:
+                    self.__sessions.append(session)
+            else:
+                session.close()
+
+    def close_sessions(self):
+        with self.__sessions_lock:
+            sessions, self.__sessions = self.__sessions, []
+        for session in sessions:
+            session.close()
+
+    @staticmethod
+    def close_cassettes():
+        if "nadi.sdk.cassette" in sys.modules:
+            sys.modules["nadi.sdk.cassette"].Cassette.close_all()
+
+    def _send_requests(
+        self,
+        auth: Auth,
+        record_limit: RecordLimit,
+        context: "dict[str, object] | None" = None,
+        select: "list[str] | None" = None,
+        stream: bool = False,
+    ) -> "Generator[Response, None, None]":
         if not isinstance(auth, RestAuth):
             raise TypeError("Provided 'auth' argument must be of type 'RestAuth'")
 
-        request = self.prepare_requests(auth)
+        request = self.prepare_requests(auth, context, select)
         response = None
-        run_count: int = 0
 
-        session = Session()
-        while (request := self.fetch_next_request(request, response)) is not None:
-            if limit is not None and run_count >= limit:
-                return
-            prepared_request = request.prepare()
-            try:
-                with session.send(prepared_request, stream=False) as response:
+        controller = self.get_adaptive_controller(request)
+        page_size = None
+
+        with self.get_session() as session:
+            while (request := self.fetch_next_request(request, response)) is not None:
+                if record_limit.is_reached:
+                    return
+                # later pages are often addressed by offsets computed from the
+                # first page size, so it is only changed on the first request.
+                # a tuned size is measured there too and applies to the next fetch.
+                if response is None:
+                    page_size = self._adapt_page_size(request, controller)
+                    if self._limit_page_size(request, record_limit):
+                        # a page cut short by the limit says nothing about
+                        # how the tuned size performs.
+                        page_size = None
+                prepared_request = request.prepare()
+                response = (
+                    session.send(prepared_request, stream=stream)
+                    if controller is None
+                    else controller.send(session, prepared_request, stream)
+                )
+                with response:
+                    if controller is not None and page_size is not None:
+                        controller.tune_page_size(self.name, page_size, response)
+                        page_size = None
                     if response.status_code != 200:
                         raise StreamResponseStatusInvalid(self.name, response)
-                    json_response = response.json()
-                    self.validate_schema(json_response)
-                run_count += 1
-                yield json_response
-            except ChunkedEncodingError as err:
-                raise StreamResponseContentInvalid(self.name) from err
+                    yield response
+
+    def fetch(
+        self,
+        auth: Auth,
+        limit: int | None = None,
+        context: "dict[str, object] | None" = None,
+        select: "list[str] | None" = None,
+    ) -> Generator[dict[str, object] | list[dict[str, object]], None, None]:
+        from requests.exceptions import ChunkedEncodingError
+
+        record_limit = RecordLimit(limit)
+        projection = Projection(select) if select else None
+        pushed_down = self.can_push_down(projection)
+        output_json_schema = self.get_output_json_schema(projection)
+        responses = self._send_requests(auth, record_limit, context, select)
+        try:
+            with closing(responses):
+                for response in responses:
+                    json_response = record_limit.take(
+                        self.extract_records(Codecs.current().loads(response.content))
+                    )
+                    if projection is not None and not pushed_down:
+                        json_response = projection.apply_all(json_response)
+                    self.validate_schema(json_response, output_json_schema)
+                    yield json_response
+                    if record_limit.is_reached:
+                        return
+        except ChunkedEncodingError as err:
+            raise StreamResponseContentInvalid(self.name) from err
+
+    def fetch_raw(
+        self,
+        auth: Auth,
+        limit: int | None = None,
+        context: "dict[str, object] | None" = None,
+        select: "list[str] | None" = None,
+    ) -> Generator[bytes, None, None]:
+        from requests.exceptions import ChunkedEncodingError
+
+        # the response is closed as soon as the limit is reached, the rest of
+        # the body is never downloaded.
+        record_limit = RecordLimit(limit)
+        responses = self._send_requests(
+            auth, record_limit, context, select, stream=True
+        )
+        try:
+            with closing(responses):
+                for response in responses:
+                    # one item per chunk, each holding many lines.
+                    splitter = JSONRecordsSplitter()
+                    for chunk in response.iter_content(self.chunk_size):
+                        if lines := record_limit.take(splitter.feed(chunk)):
+                            yield b"".join(lines)  # type: ignore
+                        if record_limit.is_reached:
+                            return
+                    try:
+                        if lines := record_limit.take(splitter.close()):
+                            yield b"".join(lines)  # type: ignore
+                    except ValueError as err:
+                        raise StreamResponseContentInvalid(self.name) from err
+                    if record_limit.is_reached:
+                        return
+        except ChunkedEncodingError as err:
+            raise StreamResponseContentInvalid(self.name) from err
 
     @abstractmethod
     def fetch_next_request(
         self,
-        previous_request: Request,
-        previous_response: Response | None,
+        previous_request: "Request",
+        previous_response: "Response | None",
     ) -> "Request| None":
         raise NotImplementedError(
             "'fetch_next_request' method has to be implemented by child class."
@@ -1,35 +1,88 @@
-from json import load, loads
+from functools import lru_cache
 from string import Formatter
-from typing import Any
-from jsonschema import validate
-from jsonpath_ng import parse  # type: ignore
+from typing import TYPE_CHECKING, Any, Generator
+from nadi.sdk.codec import Codecs
+
+if TYPE_CHECKING:
+    from jsonschema.protocols import Validator
 
 
 class Util:
+    __schema_validators: "dict[int, tuple[dict[str, object], Validator]]" = {}
+    __schema_validators_size = 64
+
     @staticmethod
     def read_json_file(json_path: str) -> "dict[str, object]":
-        with open(json_path, "r") as json_file:
-            return load(json_file)
+        with open(json_path, "rb") as json_file:
+            return Codecs.current().loads(json_file.read())
 
     @staticmethod
     def read_json_lines_file(json_path: str) -> "list[dict[str, object]]":
-        with open(json_path, "r") as json_lines_file:
-            return [loads(json_line) for json_line in json_lines_file]
+        return list(Util.iter_json_lines_file(json_path))
+
+    @staticmethod
+    def iter_json_lines_file(
+        json_path: str,
+    ) -> "Generator[dict[str, object], None, None]":
+        for _, json_line in Util.iter_json_lines_file_with_offsets(json_path):
+            yield json_line
+
+    @staticmethod
+    def iter_json_lines_file_with_offsets(
+        json_path: str,
+    ) -> "Generator[tuple[int, dict[str, object]], None, None]":
+        loads = Codecs.current().loads
+        with open(json_path, "rb") as json_lines_file:
+            offset = 0
+            for json_line in json_lines_file:
+                if not json_line.isspace():
+                    yield offset, loads(json_line)
+                offset += len(json_line)
+
+    @staticmethod
+    def read_json_line_at(json_path: str, offset: int) -> "dict[str, object]":
+        with open(json_path, "rb") as json_lines_file:
+            json_lines_file.seek(offset)
+            return Codecs.current().loads(json_lines_file.readline())
+
+    @staticmethod
+    def get_schema_validator(schema: dict[str, object]) -> "Validator":
+        from jsonschema import validators
+
+        cached = Util.__schema_validators.get(id(schema))
+        if cached is not None and cached[0] is schema:
+            return cached[1]
+        validator_class = validators.validator_for(schema)
+        validator_class.check_schema(schema)
+        validator = validator_class(schema)
+        if len(Util.__schema_validators) >= Util.__schema_validators_size:
+            # oldest first, dicts keep insertion order.
+            del Util.__schema_validators[next(iter(Util.__schema_validators))]
+        Util.__schema_validators[id(schema)] = (schema, validator)
+        return validator
 
     @staticmethod
     def validate_against_schema(instance: Any, schema: dict[str, object]):
-        validate(instance, schema)
+        Util.get_schema_validator(schema).validate(instance)
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def compile_json_path(json_path: str) -> Any:
+        from jsonpath_ng import parse  # type: ignore
+
+        return parse(json_path)  # type: ignore
 
     @staticmethod
     def filter_records_by_json_path(records: Any, json_path: str) -> list[Any]:
-        jsonpath_expr = parse(json_path)  # type: ignore
+        jsonpath_expr = Util.compile_json_path(json_path)
         return [
             match.value  # type: ignore
             for match in jsonpath_expr.find(records)  # type: ignore
         ]
 
     @staticmethod
-    def extract_format_args_from_string(string: str) -> set[str]:
-        return {
+    @lru_cache(1024)
+    def extract_format_args_from_string(string: str) -> frozenset[str]:
+        return frozenset(
             field for _, field, _, _ in Formatter().parse(string) if field is not None
-        }
+        )
@@ -0,0 +1,173 @@
+from unittest import TestCase
+from datetime import timedelta
+import json
+import os
+import tempfile
+
+import responses
+from requests import Response
+
+from nadi.sdk.adaptive import *
+from nadi.sdk.metrics import Metrics
+from nadi.sdk.stream import StreamResponseStatusInvalid
+from nadi.sdk.input import Config, RuntimeArguments
+from tests.test_source import SourceTestCase
+
+
+def make_response(status: int = 200, elapsed: float = 0.1, headers=None) -> Response:
+    response = Response()
+    response.status_code = status
+    response.elapsed = timedelta(seconds=elapsed)
+    response.headers.update(headers or {})
+    return response
+
+
+class TestAdaptiveController(TestCase):
+    def test_concurrency_aimd(self):
+        metrics = Metrics()
+        controller = AdaptiveController("api.test", metrics, max_concurrency=4)
+        for _ in range(10):
+            controller.acquire()
+            controller.release(0.1)
+        self.assertEqual(4, int(controller.concurrency))
+        self.assertEqual(4, metrics.get("adaptive.api.test.concurrency"))
+
+        controller.acquire()
+        controller.release(0.1, failed=True)
+        self.assertEqual(2, int(controller.concurrency))
+        controller.acquire()
+        controller.release(5.0)
+        self.assertEqual(1, int(controller.concurrency))
+        self.assertEqual(1, metrics.get("adaptive.api.test.concurrency"))
+        self.assertEqual(5, metrics.get("adaptive.adjustments"))
+
+    def test_server_errors_reduce_concurrency(self):
+        class ErrorSession:
+            def send(self, request, stream=False):
+                return make_response(500)
+
+        controller = AdaptiveController("api.test", Metrics(), concurrency=4)
+        response = controller.send(ErrorSession(), None)
+        self.assertEqual(500, response.status_code)
+        self.assertEqual(2, int(controller.concurrency))
+        self.assertEqual(0, controller.in_flight)
+
+    def test_retry_after(self):
+        self.assertEqual(
+            3.0,
+            AdaptiveController.get_retry_after(
+                make_response(429, headers={"Retry-After": "3"}), 0
+            ),
+        )
+        self.assertEqual(
+            0,
+            AdaptiveController.get_retry_after(
+                make_response(
+                    429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}
+                ),
+                0,
+            ),
+        )
+        self.assertEqual(0.4, AdaptiveController.get_retry_after(make_response(), 2))
+
+    def test_tune_page_size(self):
+        metrics = Metrics()
+        controller = AdaptiveController(
+            "api.test", metrics, target_latency=1.0, max_page_size=500
+        )
+        controller.tune_page_size("abc", 100, make_response(elapsed=0.1))
+        self.assertEqual(200, controller.get_page_size("abc", 100))
+        controller.tune_page_size("abc", 200, make_response(elapsed=1.6))
+        self.assertEqual(125, controller.get_page_size("abc", 100))
+        controller.tune_page_size("abc", 400, make_response(elapsed=0.01))
+        self.assertEqual(500, controller.get_page_size("abc", 100))
+        controller.tune_page_size("abc", 500, make_response(429, elapsed=0.01))
+        self.assertEqual(250, controller.get_page_size("abc", 100))
+        self.assertEqual(250, metrics.get("adaptive.api.test.abc.page_size"))
+        self.assertEqual(4, metrics.get("adaptive.adjustments"))
+
+
+class TestAdaptiveSource(SourceTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.directory.name, "adaptive.json")
+        RuntimeArguments.config = Config(
+            {
+                "nadi.output.enable_schema_validation": False,
+                "nadi.adaptive.enabled": True,
+                "nadi.adaptive.state_path": self.state_path,
+            }
+        )
+
+    def tearDown(self) -> None:
+        super().tearDown()
+        self.directory.cleanup()
+
+    @responses.activate
+    def test_retry_and_persist(self):
+        responses.get(
+            "https://api.test/sized",
+            status=429,
+            headers={"Retry-After": "0"},
+        )
+        responses.get("https://api.test/sized", json=[{"id": 1}])
+        self.source.fetch_stream("sized")
+
+        self.assertEqual([{"id": 1}], self.output_records())
+        self.assertEqual(1, self.source.metrics.get("adaptive.retries"))
+        self.assertEqual("100", responses.calls[1].request.params["per_page"])
+        with open(self.state_path) as state_file:
+            state = json.load(state_file)
+        self.assertEqual({"sized": 200}, state["api.test"]["page_sizes"])
+
+        self.output.seek(0)
+        self.output.truncate()
+        self.source.fetch_stream("sized")
+        self.assertEqual("200", responses.calls[2].request.params["per_page"])
+
+    @responses.activate
+    def test_page_size_is_fixed_during_fetch(self):
+        responses.get(
+            "https://api.test/sized",
+            json=[{"id": 1, "next_page": 2}],
+            match=[responses.matchers.query_param_matcher({"per_page": "100"})],
+        )
+        responses.get("https://api.test/sized", json=[{"id": 2, "next_page": 3}])
+        responses.get("https://api.test/sized", json=[{"id": 3}])
+        self.source.fetch_stream("sized")
+
+        self.assertEqual([1, 2, 3], [r["id"] for r in self.output_records()])
+        self.assertEqual(
+            ["100", "100", "100"],
+            [call.request.params["per_page"] for call in responses.calls],
+        )
+        with open(self.state_path) as state_file:
+            state = json.load(state_file)
+        self.assertEqual({"sized": 200}, state["api.test"]["page_sizes"])
+
+    @responses.activate
+    def test_limited_page_is_not_tuned(self):
+        responses.get(
+            "https://api.test/sized",
+            json=[{"id": 1}, {"id": 2}],
+            match=[responses.matchers.query_param_matcher({"per_page": "2"})],
+        )
+        for _ in range(2):
+            self.source.fetch_stream("sized", limit=2)
+
+        with open(self.state_path) as state_file:
+            state = json.load(state_file)
+        self.assertEqual({}, state["api.test"]["page_sizes"])
+
+    @responses.activate
+    def test_retries_exhausted(self):
+        responses.get("https://api.test/abc", status=503)
+        RuntimeArguments.config = Config(
+            {
+                "nadi.output.enable_schema_validation": False,
+                "nadi.adaptive.enabled": True,
+                "nadi.adaptive.max_retries": 0,
+            }
+        )
+        self.assertRaises(StreamResponseStatusInvalid, self.source.fetch_stream, "abc")
@@ -0,0 +1,63 @@
+from unittest import TestCase
+import threading
+import time
+
+from nadi.sdk.buffer import *
+
+
+class TestRecordBuffer(TestCase):
+    def test_put_get(self):
+        buffer = RecordBuffer(max_records=10, max_bytes=100)
+        buffer.put(b"abc\n")
+        buffer.put(b"de\n")
+        self.assertEqual(2, len(buffer))
+        self.assertEqual(7, buffer.size_in_bytes)
+        self.assertEqual(b"abc\n", buffer.get())
+
+        buffer.close()
+        self.assertEqual(b"de\n", buffer.get())
+        self.assertEqual(None, buffer.get())
+        self.assertRaises(BufferClosedError, buffer.put, b"xyz\n")
+        self.assertEqual(2, buffer.metrics.get("buffer.records_out"))
+
+    def test_backpressure(self):
+        buffer = RecordBuffer(max_records=10, max_bytes=8)
+        buffer.put(b"abcdef\n")
+
+        def _put():
+            buffer.put(b"ghi\n")
+
+        producer = threading.Thread(target=_put)
+        producer.start()
+        time.sleep(0.05)
+        self.assertTrue(producer.is_alive())
+        self.assertEqual(1, len(buffer))
+
+        self.assertEqual(b"abcdef\n", buffer.get())
+        producer.join(timeout=1)
+        self.assertFalse(producer.is_alive())
+        self.assertEqual(1, buffer.metrics.get("buffer.put_blocked"))
+        self.assertEqual(7, buffer.metrics.get("buffer.max_bytes"))
+
+        # records bigger than the byte capacity are accepted into an empty buffer
+        buffer.get()
+        buffer.put(b"x" * 20)
+        self.assertEqual(20, buffer.size_in_bytes)
+
+    def test_abort(self):
+        buffer = RecordBuffer(max_records=1, max_bytes=100)
+        buffer.put(b"abc\n")
+        errors = []
+
+        def _put():
+            try:
+                buffer.put(b"def\n")
+            except BufferClosedError as err:
+                errors.append(err)
+
+        producer = threading.Thread(target=_put)
+        producer.start()
+        buffer.abort()
+        producer.join(timeout=1)
+        self.assertEqual(1, len(errors))
+        self.assertEqual(None, buffer.get())
@@ -0,0 +1,106 @@
+from unittest import TestCase
+import os
+import tempfile
+
+import responses
+from requests import Request
+
+from nadi.sdk.cassette import *
+from nadi.sdk.input import Config, RuntimeArguments
+from tests.test_source import SourceTestCase
+
+
+class TestCassette(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cassette.db")
+
+    def tearDown(self) -> None:
+        Cassette.close_all()
+        self.directory.cleanup()
+
+    def test_replay_in_recorded_order(self):
+        cassette = Cassette.open(self.path)
+        self.assertIs(cassette, Cassette.open(self.path))
+        request = Request("GET", "https://api.test/abc", params={"a": 1}).prepare()
+        cassette.record(request, Interaction(200, "OK", {}, b"first", 0.1))
+        cassette.record(request, Interaction(200, "OK", {}, b"second", 0.2))
+        Cassette.close_all()
+
+        cassette = Cassette.open(self.path)
+        self.assertEqual(b"first", cassette.replay(request).body)
+        self.assertEqual(b"second", cassette.replay(request).body)
+        self.assertEqual(b"first", cassette.replay(request).body)
+        self.assertRaises(
+            CassetteInteractionNotFoundError,
+            cassette.replay,
+            Request("GET", "https://api.test/abc", params={"a": 2}).prepare(),
+        )
+
+    def test_request_key_ignores_headers(self):
+        self.assertEqual(
+            Cassette.request_key(Request("GET", "https://api.test/abc").prepare()),
+            Cassette.request_key(
+                Request(
+                    "GET", "https://api.test/abc", headers={"Authorization": "x"}
+                ).prepare()
+            ),
+        )
+        self.assertNotEqual(
+            Cassette.request_key(Request("POST", "https://api.test/abc").prepare()),
+            Cassette.request_key(
+                Request("POST", "https://api.test/abc", data=b"body").prepare()
+            ),
+        )
+
+
+class TestCassetteSource(SourceTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cassette.db")
+
+    def tearDown(self) -> None:
+        super().tearDown()
+        self.directory.cleanup()
+
+    def set_mode(self, mode: str):
+        RuntimeArguments.config = Config(
+            {
+                "nadi.output.enable_schema_validation": False,
+                "nadi.http.cassette.mode": mode,
+                "nadi.http.cassette.path": self.path,
+            }
+        )
+
+    def test_record_and_replay(self):
+        self.set_mode("RECORD")
+        with responses.RequestsMock() as mock:
+            mock.get(
+                "https://api.test/abc",
+                json=[{"id": 1}, {"id": 2, "next_page": 2}],
+                match=[responses.matchers.query_param_matcher({})],
+            )
+            mock.get(
+                "https://api.test/abc",
+                json=[{"id": 3}],
+                match=[responses.matchers.query_param_matcher({"page": "2"})],
+            )
+            self.source.fetch_stream("abc")
+        recorded = self.output.getvalue()
+
+        self.output.seek(0)
+        self.output.truncate()
+        self.set_mode("REPLAY")
+        with responses.RequestsMock():
+            self.source.fetch_stream("abc")
+        self.assertEqual(recorded, self.output.getvalue())
+        self.assertEqual(
+            [{"id": 1}, {"id": 2, "next_page": 2}, {"id": 3}], self.output_records()
+        )
+
+    def test_replay_missing_interaction(self):
+        self.set_mode("REPLAY")
+        self.assertRaises(
+            CassetteInteractionNotFoundError, self.source.fetch_stream, "abc"
+        )
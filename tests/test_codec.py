@@ -0,0 +1,39 @@
+from unittest import TestCase
+from unittest import mock
+
+from nadi.sdk.codec import *
+
+
+class TestCodecs(TestCase):
+    def tearDown(self) -> None:
+        Codecs.select("stdlib")
+
+    def test_codecs(self):
+        for codec_class in Codecs.supported_codecs:
+            if not codec_class.is_available():
+                continue
+            codec = Codecs.get(codec_class.name)
+            self.assertEqual(
+                b'{"a":[1,"\xc3\xa9",null]}', codec.dumps({"a": [1, "é", None]})
+            )
+            self.assertEqual({"a": [1, "é"]}, codec.loads('{"a": [1, "é"]}'.encode()))
+
+    def test_default_is_exact(self):
+        codec = Codecs.current()
+        self.assertEqual("stdlib", codec.name)
+        self.assertEqual(
+            {"a": 123456789012345678901234567890},
+            codec.loads(b'{"a": 123456789012345678901234567890}'),
+        )
+        self.assertEqual([float("inf")], codec.loads(b"[1e400]"))
+
+    def test_select(self):
+        Codecs.select("stdlib")
+        self.assertEqual("stdlib", Codecs.current().name)
+        self.assertRaises(CodecNotSupportedError, Codecs.select, "unknown")
+        with mock.patch.object(MsgspecCodec, "is_available", return_value=False):
+            self.assertRaises(CodecNotAvailableError, Codecs.select, "msgspec")
+        with mock.patch.object(OrjsonCodec, "is_available", return_value=False):
+            with mock.patch.object(MsgspecCodec, "is_available", return_value=False):
+                self.assertEqual("stdlib", Codecs.get("auto").name)
+        self.assertEqual("stdlib", Codecs.current().name)
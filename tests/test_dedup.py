@@ -0,0 +1,45 @@
+from unittest import TestCase
+import os
+import tempfile
+
+from nadi.sdk.dedup import *
+
+
+class TestExactDeduplicator(TestCase):
+    def test_add(self):
+        with tempfile.TemporaryDirectory() as spill_directory:
+            deduplicator = ExactDeduplicator(
+                max_keys=10, spill_directory=spill_directory
+            )
+            keys = [str(i).encode() for i in range(100)]
+            self.assertTrue(all(deduplicator.add(key) for key in keys))
+            self.assertEqual(1, len(os.listdir(spill_directory)))
+
+            # keys which were spilled to disk are still detected
+            self.assertFalse(any(deduplicator.add(key) for key in keys))
+            self.assertTrue(deduplicator.add(b"100"))
+
+            deduplicator.close()
+            self.assertEqual([], os.listdir(spill_directory))
+
+
+class TestBloomDeduplicator(TestCase):
+    def test_size(self):
+        deduplicator = BloomDeduplicator(
+            expected_records=1000, false_positive_rate=0.01
+        )
+        self.assertEqual(9585, deduplicator.size)
+        self.assertEqual(7, deduplicator.hash_count)
+
+    def test_add(self):
+        deduplicator = BloomDeduplicator(
+            expected_records=11000, false_positive_rate=0.01
+        )
+        keys = [str(i).encode() for i in range(1000)]
+        self.assertTrue(all(deduplicator.add(key) for key in keys))
+        self.assertFalse(any(deduplicator.add(key) for key in keys))
+
+        false_positives = sum(
+            not deduplicator.add(str(i).encode()) for i in range(1000, 11000)
+        )
+        self.assertLess(false_positives, 200)
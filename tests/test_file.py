@@ -0,0 +1,167 @@
+from unittest import TestCase
+from unittest import mock
+import io
+import json
+import os
+import tempfile
+
+from jsonschema import ValidationError
+
+from nadi.sdk.config import Configs, StringConf
+from nadi.sdk.input import *
+from nadi.sdk.file import *
+
+
+class TestFileSource(TestCase):
+    def setUp(self) -> None:
+        self.supported_configs = list(Configs.supported_configs)
+        self.directory = tempfile.TemporaryDirectory()
+        self.records = [
+            {"id": i, "name": f"user {i}", "tags": ["a"] if i % 2 else []}
+            for i in range(500)
+        ]
+        self.jsonl_path = os.path.join(self.directory.name, "users.jsonl")
+        with open(self.jsonl_path, "w") as file:
+            for record in self.records:
+                file.write(json.dumps(record) + "\n")
+                if record["id"] % 100 == 0:
+                    file.write("\r\n")
+        self.csv_path = os.path.join(self.directory.name, "users.csv")
+        with open(self.csv_path, "w") as file:
+            file.write("id,name\n")
+            for record in self.records:
+                file.write(f'{record["id"]},"{record["name"]}"\n')
+
+        schema = {
+            "type": "object",
+            "required": ["id", "name"],
+            "properties": {"id": {}, "name": {}, "tags": {}},
+        }
+        self.source = FileSource("test")
+        self.source.supported_streams = [
+            FileStream(
+                "users",
+                "",
+                "{data_directory}/users.jsonl",
+                output_json_schema=schema,
+                primary_key="$.id",
+            ),
+            FileStream(
+                "users_csv",
+                "",
+                "{data_directory}/users.csv",
+                file_format="csv",
+                output_json_schema=schema,
+            ),
+        ]
+        self.source.supported_configs = [
+            StringConf("nadi.data_directory", None, "data_directory")
+        ]
+        self.output = io.BytesIO()
+        self.source.output = self.output
+        self.set_config()
+        RuntimeArguments.catalog = None
+        RuntimeArguments.state = None
+
+    def tearDown(self) -> None:
+        Configs.supported_configs = self.supported_configs
+        RuntimeArguments.config = None
+        RuntimeArguments.catalog = None
+        RuntimeArguments.state = None
+        self.directory.cleanup()
+
+    def set_config(self, **configs: object):
+        RuntimeArguments.config = Config(
+            dict(
+                {
+                    "data_directory": self.directory.name,
+                    "nadi.file.workers": 1,
+                    "nadi.file.chunk_size": 1024,
+                },
+                **configs,
+            )
+        )
+
+    def output_records(self) -> list[dict[str, object]]:
+        return [json.loads(line) for line in self.output.getvalue().splitlines()]
+
+    def test_get_chunks(self):
+        stream = self.source.get_stream("users")
+        _, chunks = stream.get_chunks(self.jsonl_path, 1000)
+        chunks = list(chunks)
+        with open(self.jsonl_path, "rb") as file:
+            data = file.read()
+        self.assertGreater(len(chunks), 10)
+        self.assertEqual(data, b"".join(data[c.start : c.end] for c in chunks))
+        for chunk in chunks:
+            self.assertEqual(b"\n", data[chunk.end - 1 : chunk.end])
+
+        empty_path = os.path.join(self.directory.name, "empty.jsonl")
+        open(empty_path, "w").close()
+        self.assertEqual([], list(stream.get_chunks(empty_path, 1000)[1]))
+
+    def test_fetch_stream(self):
+        self.source.fetch_stream("users")
+        self.assertEqual(self.records, self.output_records())
+        self.assertEqual(500, self.source.metrics.get("buffer.records_out"))
+
+    def test_fetch_csv(self):
+        self.source.fetch_stream("users_csv", limit=3)
+        self.assertEqual(
+            [{"id": str(i), "name": f"user {i}"} for i in range(3)],
+            self.output_records(),
+        )
+
+    def test_fetch_with_limit(self):
+        self.source.fetch_stream("users", limit=123)
+        self.assertEqual(self.records[:123], self.output_records())
+
+    def test_fetch_all_with_select_and_dedup(self):
+        RuntimeArguments.catalog = Catalog([{"name": "users", "select": ["id"]}])
+        self.set_config(**{"nadi.dedup.mode": "EXACT"})
+        self.source.fetch_all()
+        self.assertEqual(
+            [{"id": record["id"]} for record in self.records], self.output_records()
+        )
+
+    def test_schema_validation(self):
+        self.source.supported_streams[0].output_json_schema = {
+            "type": "object",
+            "required": ["missing"],
+        }
+        self.assertRaises(ValidationError, self.source.fetch_stream, "users")
+
+    def test_fetch_in_worker_processes(self):
+        self.set_config(**{"nadi.file.workers": 2, "nadi.file.max_in_flight": 3})
+        self.source.fetch_stream("users")
+        self.assertEqual(self.records, self.output_records())
+
+        self.output.seek(0)
+        self.output.truncate()
+        self.set_config(**{"nadi.file.workers": 2, "nadi.file.ordered": False})
+        self.source.fetch_stream("users")
+        self.assertEqual(
+            self.records, sorted(self.output_records(), key=lambda r: r["id"])
+        )
+
+    def test_worker_processes_per_chunk(self):
+        size = os.path.getsize(self.jsonl_path)
+        with mock.patch("concurrent.futures.ProcessPoolExecutor") as executor:
+            self.set_config(**{"nadi.file.workers": 0, "nadi.file.chunk_size": size})
+            self.source.fetch_stream("users")
+            executor.assert_not_called()
+        self.assertEqual(self.records, self.output_records())
+
+        with mock.patch.object(
+            FileStream, "_get_executor", return_value=None
+        ) as executor:
+            self.set_config(
+                **{"nadi.file.workers": 8, "nadi.file.chunk_size": size // 2 + 1}
+            )
+            self.source.fetch_stream("users")
+            executor.assert_called_once_with(2)
+
+    def test_unsupported_format(self):
+        self.assertRaises(
+            FileFormatNotSupportedError, FileStream, "x", "", "x.xml", "xml"
+        )
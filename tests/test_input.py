@@ -0,0 +1,53 @@
+from unittest import TestCase
+import json
+import os
+import tempfile
+
+from jsonschema import ValidationError
+
+from nadi.sdk.input import *
+
+
+class TestJSONLinesConfigInput(TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.json_path = os.path.join(self.temp_dir.name, "catalog.jsonl")
+        with open(self.json_path, "w") as json_lines_file:
+            json_lines_file.write(json.dumps({"name": "abc"}) + "\n")
+            json_lines_file.write(
+                json.dumps({"name": "def", "configs": {"nadi.x": 1}}) + "\n"
+            )
+            json_lines_file.write("\n")
+            json_lines_file.write(
+                json.dumps({"name": "abc", "configs": {"nadi.x": 2}}) + "\n"
+            )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_eager_load(self):
+        catalog = Catalog(self.json_path)
+        self.assertEqual(
+            ["abc", "def", "abc"], [line.name for line in catalog.json_lines_data]
+        )
+        self.assertRaises(ValidationError, Catalog, [{"configs": {}}])
+
+    def test_lazy_load(self):
+        catalog = Catalog(self.json_path, lazy=True)
+        lines = catalog.iter_json_lines_data()
+        self.assertEqual("abc", next(lines).name)
+        self.assertEqual({"nadi.x": 1}, next(lines).configs)
+        self.assertEqual("abc", next(lines).name)
+        self.assertRaises(StopIteration, next, lines)
+
+        catalog = Catalog([{"name": "abc"}, {"configs": {}}], lazy=True)
+        lines = catalog.iter_json_lines_data()
+        self.assertEqual("abc", next(lines).name)
+        self.assertRaises(ValidationError, next, lines)
+
+    def test_get_json_line_data(self):
+        for lazy in [False, True]:
+            state = State(self.json_path, lazy=lazy)
+            self.assertEqual({"nadi.x": 2}, state.get_json_line_data("abc").configs)
+            self.assertEqual({"nadi.x": 1}, state.get_json_line_data("def").configs)
+            self.assertEqual(None, state.get_json_line_data("ghi"))
@@ -0,0 +1,40 @@
+from unittest import TestCase
+import json
+
+from nadi.sdk.passthrough import *
+
+
+class TestJSONRecordsSplitter(TestCase):
+    def split(self, body: bytes, chunk_size: int) -> list[bytes]:
+        splitter = JSONRecordsSplitter()
+        lines = []
+        for i in range(0, len(body), chunk_size):
+            lines.extend(splitter.feed(body[i : i + chunk_size]))
+        return lines + splitter.close()
+
+    def test_array(self):
+        records = [
+            {"id": 1, "name": 'a "quoted", [bracketed] {braced} \\ value'},
+            {"id": 2, "nested": {"list": [1, [2, {"x": "]"}]], "empty": {}}},
+            [1, 2],
+            "text",
+            3.5,
+            None,
+        ]
+        for indent in [None, 2]:
+            body = json.dumps(records, indent=indent).encode()
+            for chunk_size in [1, 3, 7, 64, len(body)]:
+                lines = self.split(body, chunk_size)
+                self.assertTrue(all(line.count(b"\n") == 1 for line in lines))
+                self.assertEqual(records, [json.loads(line) for line in lines])
+
+    def test_object_and_empty(self):
+        body = json.dumps({"id": 1, "values": [1, 2]}, indent=2).encode()
+        self.assertEqual(
+            [b'{  "id": 1,  "values": [    1,    2  ]}\n'], self.split(body, 5)
+        )
+        self.assertEqual([], self.split(b" [ ] ", 1))
+        self.assertEqual([], self.split(b"", 1))
+
+    def test_incomplete(self):
+        self.assertRaises(ValueError, self.split, b'[{"id": 1}, {"id"', 4)
@@ -0,0 +1,63 @@
+from unittest import TestCase
+
+from nadi.sdk.projection import *
+
+
+class TestProjection(TestCase):
+    def test_apply(self):
+        record = {
+            "id": 1,
+            "customer": {"name": "abc", "age": 20},
+            "items": [{"sku": "x", "qty": 1}, {"sku": "y"}],
+            "total": 10,
+        }
+        projection = Projection(["id", "$.customer.name", "missing.field"])
+        self.assertEqual(["id", "customer.name", "missing.field"], projection.fields)
+        self.assertEqual(
+            {"id": 1, "customer": {"name": "abc"}}, projection.apply(record)
+        )
+
+        projection = Projection(["id", "items[*].sku"])
+        self.assertEqual(None, projection.fields)
+        self.assertEqual(
+            [{"id": 1, "items": [{"sku": "x"}, {"sku": "y"}]}],
+            projection.apply_all([record]),
+        )
+
+        for select in [["$"], ["id", "$"]]:
+            projection = Projection(select)
+            self.assertEqual(None, projection.fields)
+            self.assertEqual(record, projection.apply(record))
+
+    def test_prune_schema(self):
+        schema = {
+            "type": "object",
+            "required": ["id", "total", "customer"],
+            "properties": {
+                "id": {"type": "integer"},
+                "total": {"type": "number"},
+                "customer": {
+                    "type": "object",
+                    "required": ["age"],
+                    "properties": {"name": {}, "age": {}},
+                },
+                "items": {"type": "array"},
+            },
+        }
+        self.assertEqual(
+            {
+                "type": "object",
+                "required": ["id", "customer"],
+                "properties": {
+                    "id": {"type": "integer"},
+                    "customer": {
+                        "type": "object",
+                        "required": [],
+                        "properties": {"name": {}},
+                    },
+                    "items": {"type": "array"},
+                },
+            },
+            Projection(["id", "customer.name", "items[*].sku"]).prune_schema(schema),
+        )
+        self.assertEqual(schema, Projection(["$"]).prune_schema(schema))
@@ -0,0 +1,229 @@
+from unittest import TestCase
+import io
+import json
+import os
+import tempfile
+import threading
+from time import sleep
+
+import responses
+from requests import Request
+
+from nadi.sdk.auth import NoRestAuth
+from nadi.sdk.config import *
+from nadi.sdk.input import *
+from nadi.sdk.scheduler import *
+from nadi.sdk.source import Source
+from tests.test_source import SinglePageStream
+
+
+class TestConfigContext(TestCase):
+    def test_new_context(self):
+        conf = StringConf("nadi.context.only", None, is_required=False)
+        config = RuntimeArguments.config
+        context = Configs.new_context()
+        context.run(Configs.add_supported_config, conf)
+        context.run(setattr, RuntimeArguments, "config", Config({}))
+
+        self.assertNotIn(conf, Configs.supported_configs)
+        self.assertIn(conf, context.run(lambda: Configs.supported_configs))
+        self.assertEqual(
+            len(Configs.base_supported_configs) + 1,
+            len(context.run(lambda: Configs.supported_configs)),
+        )
+        self.assertIs(config, RuntimeArguments.config)
+
+    def test_threads_inherit_context(self):
+        context = Configs.new_context()
+        context.run(setattr, RuntimeArguments, "config", Config({"a": 1}))
+        seen = []
+        thread = threading.Thread(
+            target=context.run,
+            args=(lambda: seen.append(RuntimeArguments.config.get("a")),),
+        )
+        thread.start()
+        thread.join()
+        self.assertEqual([1], seen)
+
+
+class TestFairScheduler(TestCase):
+    def test_source_not_registered(self):
+        with FairScheduler(1) as scheduler:
+            self.assertRaises(
+                SchedulerSourceNotRegisteredError, scheduler.submit, "x", print
+            )
+        self.assertRaises(SchedulerIsShutdownError, scheduler.submit, "x", print)
+
+    def test_weighted_share(self):
+        order = []
+        with FairScheduler(1) as scheduler:
+            scheduler.register("heavy", weight=3)
+            scheduler.register("light", weight=1)
+            gate = threading.Event()
+            scheduler.register("gate")
+            scheduler.submit("gate", gate.wait)
+            futures = [
+                scheduler.submit(
+                    name, lambda name=name: (sleep(0.01), order.append(name))
+                )
+                for _ in range(12)
+                for name in ["heavy", "light"]
+            ]
+            gate.set()
+            for future in futures:
+                future.result()
+        self.assertGreaterEqual(order[:12].count("heavy"), 8)
+
+    def test_slow_source_does_not_starve_others(self):
+        done = []
+        with FairScheduler(2) as scheduler:
+            scheduler.register("slow", max_concurrency=1)
+            scheduler.register("fast")
+            slow = [
+                scheduler.submit("slow", lambda: (sleep(0.05), done.append("slow")))
+                for _ in range(5)
+            ]
+            fast = [
+                scheduler.submit("fast", lambda: (sleep(0.001), done.append("fast")))
+                for _ in range(10)
+            ]
+            for future in fast:
+                future.result()
+            self.assertLessEqual(done.count("slow"), 2)
+            for future in slow:
+                future.result()
+        self.assertEqual(5, scheduler.share("slow").running + done.count("slow"))
+
+    def test_sources_leave_a_worker_free_by_default(self):
+        done = []
+        with FairScheduler(2) as scheduler:
+            scheduler.register("slow")
+            scheduler.register("fast")
+            slow = [
+                scheduler.submit("slow", lambda: (sleep(0.1), done.append("slow")))
+                for _ in range(3)
+            ]
+            fast = [
+                scheduler.submit("fast", lambda: (sleep(0.001), done.append("fast")))
+                for _ in range(10)
+            ]
+            for future in fast:
+                future.result()
+            # one worker was kept free, fast jobs did not wait for slow ones.
+            self.assertEqual(0, done.count("slow"))
+            for future in slow:
+                future.result()
+        self.assertEqual(3, done.count("slow"))
+
+
+class TestFairSchedulerSources(TestCase):
+    def make_source(self, name: str, conf: Conf) -> Source:
+        source = Source(name)
+        source.supported_configs = [conf]
+        source.supported_auths = [NoRestAuth()]
+        source.supported_streams = [
+            SinglePageStream("abc", "", Request("GET", "https://{test_host}/abc"))
+        ]
+        source.output = io.BytesIO()
+        return source
+
+    @responses.activate
+    def test_sources_are_isolated(self):
+        for host in ["one.test", "two.test"]:
+            responses.get(f"https://{host}/abc", json=[{"host": host}])
+        # the same key with different defaults, each source sees its own.
+        one = self.make_source(
+            "one", StringConf("nadi.test.host", "one.test", "test_host")
+        )
+        two = self.make_source(
+            "two", StringConf("nadi.test.host", "two.test", "test_host")
+        )
+        supported_configs = list(Configs.supported_configs)
+        catalog = RuntimeArguments.catalog
+
+        with FairScheduler(2) as scheduler:
+            futures = [
+                scheduler.fetch_all(
+                    source,
+                    Config({"nadi.output.enable_schema_validation": False}),
+                    Catalog([{"name": "abc"}]),
+                    max_concurrency=1,
+                )
+                for source in [one, two]
+            ]
+            for future in futures:
+                future.result()
+
+        for source in [one, two]:
+            self.assertEqual(
+                [{"host": f"{source.name}.test"}],
+                [json.loads(line) for line in source.output.getvalue().splitlines()],
+            )
+        self.assertEqual(supported_configs, Configs.supported_configs)
+        self.assertIs(catalog, RuntimeArguments.catalog)
+
+    @responses.activate
+    def test_source_runs_twice(self):
+        responses.get("https://one.test/abc", json=[{"id": 1}])
+        source = self.make_source(
+            "one", StringConf("nadi.test.host", "one.test", "test_host")
+        )
+
+        with FairScheduler(1) as scheduler:
+            for _ in range(2):
+                scheduler.fetch_all(
+                    source,
+                    Config({"nadi.output.enable_schema_validation": False}),
+                    Catalog([{"name": "abc"}]),
+                ).result()
+
+        self.assertEqual(
+            [{"id": 1}, {"id": 1}],
+            [json.loads(line) for line in source.output.getvalue().splitlines()],
+        )
+        self.assertIsNone(source.scheduler)
+
+    @responses.activate
+    def test_adaptive_controllers_are_isolated(self):
+        sources = []
+        for host in ["one.test", "two.test"]:
+            responses.get(f"https://{host}/abc", json=[{"host": host}])
+            sources.append(
+                self.make_source(
+                    host.split(".")[0], StringConf("nadi.test.host", host, "test_host")
+                )
+            )
+
+        with tempfile.TemporaryDirectory() as directory:
+            with FairScheduler(2) as scheduler:
+                futures = [
+                    scheduler.fetch_all(
+                        source,
+                        Config(
+                            {
+                                "nadi.output.enable_schema_validation": False,
+                                "nadi.adaptive.enabled": True,
+                                "nadi.adaptive.state_path": os.path.join(
+                                    directory, f"{source.name}.json"
+                                ),
+                            }
+                        ),
+                        Catalog([{"name": "abc"}]),
+                    )
+                    for source in sources
+                ]
+                for future in futures:
+                    future.result()
+
+            for source in sources:
+                host = f"{source.name}.test"
+                with open(os.path.join(directory, f"{source.name}.json")) as file:
+                    self.assertEqual([host], list(json.load(file)))
+                self.assertEqual(
+                    [f"adaptive.{host}.concurrency"],
+                    [
+                        key
+                        for key in source.metrics.to_dict()
+                        if key.endswith(".concurrency")
+                    ],
+                )
@@ -0,0 +1,172 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+import responses
+
+from nadi.sdk.input import RuntimeArguments
+from nadi.sdk.server import *
+from tests.test_source import SourceTestCase
+
+
+class TestServer(SourceTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.server = Server(
+            self.source, {"nadi.output.enable_schema_validation": False}
+        )
+
+    def tearDown(self) -> None:
+        self.server.close()
+        super().tearDown()
+
+    def serve(self, *jobs: object) -> list[dict[str, object]]:
+        output = io.BytesIO()
+        self.server.serve(
+            io.BytesIO(
+                b"\n".join(
+                    job if isinstance(job, bytes) else json.dumps(job).encode()
+                    for job in jobs
+                )
+            ),
+            output,
+        )
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    @responses.activate
+    def test_inline_jobs(self):
+        responses.get("https://api.test/abc", json=[{"id": 1}, {"id": 2}])
+        responses.get("https://api.test/def", json=[{"id": 3}])
+        lines = self.serve(
+            {"id": "a", "stream": "abc", "limit": 1},
+            {"id": 7, "catalog": [{"name": "def"}]},
+        )
+
+        self.assertEqual({"id": "a", "record": {"id": 1}}, lines[0])
+        self.assertEqual("ok", lines[1]["status"])
+        self.assertEqual("a", lines[1]["id"])
+        self.assertEqual(1, lines[1]["metrics"]["buffer.records_out"])
+        self.assertEqual({"id": 7, "record": {"id": 3}}, lines[2])
+        self.assertEqual((7, "ok"), (lines[3]["id"], lines[3]["status"]))
+        self.assertEqual(None, RuntimeArguments.catalog)
+        self.assertEqual(b"", self.output.getvalue())
+
+    @responses.activate
+    def test_job_errors_are_reported(self):
+        responses.get("https://api.test/abc", status=500)
+        responses.get("https://api.test/def", json=[{"id": 3}])
+        lines = self.serve(
+            b"{not json",
+            {"id": 1, "stream": "abc"},
+            {"id": 2, "limit": "x"},
+            {"id": 3},
+            {"id": 4, "stream": "def"},
+        )
+
+        self.assertEqual([None, 1, 2, 3, 4, 4], [line["id"] for line in lines])
+        self.assertEqual(["error"] * 4, [line["status"] for line in lines[:4]])
+        self.assertEqual({"id": 4, "record": {"id": 3}}, lines[4])
+        self.assertEqual("ok", lines[5]["status"])
+
+    @responses.activate
+    def test_output_file_and_job_config(self):
+        responses.get("https://api.test/ghi", json={"data": [{"name": "x"}]})
+        with tempfile.TemporaryDirectory() as directory:
+            self.server.directory = os.path.realpath(directory)
+            path = os.path.join(directory, "out.jsonl")
+            lines = self.serve(
+                {"id": 1, "stream": "ghi", "output": "out.jsonl"},
+                {
+                    "id": 2,
+                    "stream": "ghi",
+                    "config": {"nadi.output.enable_schema_validation": True},
+                },
+            )
+            with open(path, "rb") as output_file:
+                self.assertEqual(b'{"name":"x"}\n', output_file.read())
+        self.assertEqual("ok", lines[0]["status"])
+        self.assertEqual("error", lines[1]["status"])
+
+    def test_paths_outside_directory_are_rejected(self):
+        with tempfile.TemporaryDirectory() as directory:
+            outside = os.path.join(directory, "outside.jsonl")
+            os.mkdir(os.path.join(directory, "jobs"))
+            os.symlink(outside, os.path.join(directory, "jobs", "link.jsonl"))
+            jobs = [
+                {"id": 1, "stream": "abc", "output": outside},
+                {"id": 2, "stream": "abc", "output": "../outside.jsonl"},
+                {"id": 3, "stream": "abc", "output": "link.jsonl"},
+                {"id": 4, "stream": "abc", "config": outside},
+                {"id": 5, "catalog": outside},
+                {"id": 6, "stream": "abc", "state": outside},
+            ]
+            lines = self.serve(*jobs)
+            self.server.directory = os.path.realpath(os.path.join(directory, "jobs"))
+            lines += self.serve(*jobs)
+            self.assertFalse(os.path.exists(outside))
+
+        self.assertEqual(12, len(lines))
+        for line in lines:
+            self.assertEqual("error", line["status"])
+            self.assertIn("outside of the server's job directory", line["error"])
+
+    def test_path_configs_are_confined(self):
+        with tempfile.TemporaryDirectory() as directory:
+            outside = os.path.join(directory, "outside")
+            self.server.directory = os.path.realpath(os.path.join(directory, "jobs"))
+            lines = self.serve(
+                {"id": 1, "config": {"nadi.adaptive.state_path": outside}},
+                {
+                    "id": 2,
+                    "catalog": [
+                        {"name": "abc", "configs": {"nadi.http.cassette.path": outside}}
+                    ],
+                },
+                {
+                    "id": 3,
+                    "stream": "abc",
+                    "state": [
+                        {
+                            "name": "abc",
+                            "configs": {"nadi.dedup.spill_directory": outside},
+                        }
+                    ],
+                },
+            )
+        self.assertEqual(["error"] * 3, [line["status"] for line in lines])
+        for line in lines:
+            self.assertIn("outside of the server's job directory", line["error"])
+
+        self.server.directory = "/data"
+        self.assertEqual(
+            {"nadi.dedup.spill_directory": "/data/spill", "other": "/x"},
+            self.server.confine_configs(
+                {"nadi.dedup.spill_directory": "spill", "other": "/x"}
+            ),
+        )
+
+    def test_unix_socket_is_private(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "nadi.sock")
+
+            def serve_forever(unix_server):
+                self.assertEqual(0o600, os.stat(path).st_mode & 0o777)
+
+            with mock.patch(
+                "socketserver.ThreadingUnixStreamServer.serve_forever", serve_forever
+            ):
+                self.server.serve_unix_socket(path)
+            self.assertFalse(os.path.exists(path))
+
+    @responses.activate
+    def test_sessions_are_pooled(self):
+        responses.get("https://api.test/abc", json=[{"id": 1}])
+        stream = self.source.get_stream("abc")
+        with mock.patch.object(
+            stream, "create_session", wraps=stream.create_session
+        ) as create_session:
+            lines = self.serve(*[{"id": i, "stream": "abc"} for i in range(3)])
+        self.assertEqual(6, len(lines))
+        self.assertEqual(1, create_session.call_count)
@@ -0,0 +1,404 @@
+from unittest import TestCase
+import io
+import json
+from unittest import mock
+
+import responses
+from requests import Request
+
+from nadi.sdk.auth import NoRestAuth
+from nadi.sdk.codec import Codecs, OrjsonCodec
+from nadi.sdk.config import Configs
+from nadi.sdk.graph import StreamGraphCycleError, StreamParentNotSupportedError
+from nadi.sdk.input import *
+from nadi.sdk.source import *
+from nadi.sdk.stream import (
+    RestStream,
+    StreamDoesNotHaveOutputSchemaError,
+    StreamResponseStatusInvalid,
+)
+
+
+class PagedStream(RestStream):
+    def required_configs(self) -> set[str]:
+        return set()
+
+    def fetch_next_request(self, previous_request, previous_response):
+        if previous_response is None:
+            return previous_request
+        records = previous_response.json()
+        last_record = records[-1] if isinstance(records, list) else records
+        next_page = last_record.get("next_page")
+        if next_page is None:
+            return None
+        previous_request.params["page"] = next_page
+        return previous_request
+
+
+class SinglePageStream(RestStream):
+    def required_configs(self) -> set[str]:
+        return set()
+
+    def fetch_next_request(self, previous_request, previous_response):
+        return previous_request if previous_response is None else None
+
+
+class SourceTestCase(TestCase):
+    def setUp(self) -> None:
+        self.supported_configs = list(Configs.supported_configs)
+        self.source = Source("test")
+        self.source.supported_auths = [NoRestAuth()]
+        self.source.supported_streams = [
+            PagedStream("abc", "", Request("GET", "https://api.test/abc")),
+            PagedStream("def", "", Request("GET", "https://api.test/def")),
+            PagedStream(
+                "ghi",
+                "",
+                Request("GET", "https://api.test/ghi"),
+                output_json_schema={"type": "object", "required": ["id"]},
+                records_path="$.data[*]",
+            ),
+            SinglePageStream(
+                "orders",
+                "",
+                Request("GET", "https://api.test/orders"),
+                records_path="$.orders[*]",
+            ),
+            SinglePageStream(
+                "items",
+                "",
+                Request("GET", "https://api.test/orders/{order_id}/items"),
+                parent="orders",
+                parent_bindings={"order_id": "$.id"},
+            ),
+            SinglePageStream(
+                "item_details",
+                "",
+                Request("GET", "https://api.test/orders/{order_id}/items/{item_id}"),
+                parent="items",
+                parent_bindings={"item_id": "$.item_id"},
+            ),
+            SinglePageStream(
+                "customers",
+                "",
+                Request("GET", "https://api.test/customers"),
+                output_json_schema={
+                    "type": "object",
+                    "required": ["id", "name", "email"],
+                    "properties": {"id": {}, "name": {}, "email": {}},
+                },
+                select_param="fields",
+            ),
+            PagedStream(
+                "sized",
+                "",
+                Request("GET", "https://api.test/sized", params={"per_page": "100"}),
+                page_size_param="per_page",
+            ),
+            SinglePageStream(
+                "events",
+                "",
+                Request("GET", "https://api.test/events"),
+                primary_key="$.id",
+                passthrough=True,
+            ),
+            SinglePageStream(
+                "raw",
+                "",
+                Request("GET", "https://api.test/raw"),
+                passthrough=True,
+            ),
+        ]
+        self.output = io.BytesIO()
+        self.source.output = self.output
+        RuntimeArguments.config = Config(
+            {"nadi.output.enable_schema_validation": False}
+        )
+        RuntimeArguments.catalog = None
+        RuntimeArguments.state = None
+
+    def tearDown(self) -> None:
+        Configs.supported_configs = self.supported_configs
+        RuntimeArguments.config = None
+        RuntimeArguments.catalog = None
+        RuntimeArguments.state = None
+
+    def output_records(self) -> list[dict[str, object]]:
+        return [json.loads(line) for line in self.output.getvalue().splitlines()]
+
+
+class TestSource(SourceTestCase):
+    @responses.activate
+    def test_fetch_stream(self):
+        responses.get(
+            "https://api.test/abc",
+            json=[{"id": 1}, {"id": 2, "next_page": 2}],
+            match=[responses.matchers.query_param_matcher({})],
+        )
+        responses.get(
+            "https://api.test/abc?page=2",
+            json=[{"id": 3}],
+            match=[responses.matchers.query_param_matcher({"page": "2"})],
+        )
+
+        with mock.patch.object(
+            RecordBuffer, "put", autospec=True, side_effect=RecordBuffer.put
+        ) as put:
+            self.source.fetch_stream("abc")
+        self.assertEqual([1, 2, 3], [r["id"] for r in self.output_records()])
+        self.assertEqual(3, self.source.metrics.get("buffer.records_out"))
+        # one buffer item per page.
+        self.assertEqual([2, 1], [call.args[2] for call in put.call_args_list])
+
+    @responses.activate
+    def test_fetch_all(self):
+        responses.get("https://api.test/abc", json=[{"id": 1}])
+        responses.get("https://api.test/def", json={"id": 2})
+        RuntimeArguments.config = Config(
+            {"nadi.output.enable_schema_validation": False, "nadi.fetch.max_workers": 2}
+        )
+        RuntimeArguments.catalog = Catalog([{"name": "abc"}, {"name": "def"}])
+
+        self.source.fetch_all()
+        self.assertEqual([1, 2], sorted(r["id"] for r in self.output_records()))
+
+    @responses.activate
+    def test_fetch_error_is_raised(self):
+        responses.get("https://api.test/abc", status=500)
+        RuntimeArguments.catalog = Catalog([{"name": "abc"}, {"name": "jkl"}])
+
+        self.assertRaises(StreamNotSupportedError, self.source.fetch_stream, "jkl")
+        self.assertRaises(StreamResponseStatusInvalid, self.source.fetch_all)
+
+    @responses.activate
+    def test_schema_validation(self):
+        responses.get("https://api.test/abc", json=[{"id": 1}])
+        responses.get("https://api.test/ghi", json={"data": [{"id": 1}, {"id": 2}]})
+        RuntimeArguments.config = Config({})
+
+        self.assertRaises(
+            StreamDoesNotHaveOutputSchemaError, self.source.fetch_stream, "abc"
+        )
+        self.source.fetch_stream("ghi")
+        self.assertEqual([{"id": 1}, {"id": 2}], self.output_records())
+
+    @responses.activate
+    def test_passthrough(self):
+        responses.get("https://api.test/raw", body=b'[\n {"id": 1},\n {"id": 2}\n]')
+        RuntimeArguments.config = Config(
+            {"nadi.output.enable_schema_validation": False, "nadi.codec": "stdlib"}
+        )
+
+        with mock.patch.object(SinglePageStream, "fetch") as fetch:
+            self.source.fetch_stream("raw")
+            fetch.assert_not_called()
+        self.assertEqual(b'{"id": 1}\n{"id": 2}\n', self.output.getvalue())
+
+        RuntimeArguments.config = Config({})
+        self.assertFalse(self.source.get_stream("raw").can_passthrough())
+
+    def test_passthrough_needs_stdlib_codec(self):
+        stream = self.source.get_stream("raw")
+        try:
+            Codecs.select("stdlib")
+            self.assertTrue(stream.can_passthrough())
+            if OrjsonCodec.is_available():
+                Codecs.select("orjson")
+                self.assertFalse(stream.can_passthrough())
+        finally:
+            Codecs.select("stdlib")
+
+    @responses.activate
+    def test_passthrough_matches_decode(self):
+        responses.get("https://api.test/raw", body=b'[{"id": 1}, {"id": 2}]')
+        RuntimeArguments.config = Config(
+            {"nadi.output.enable_schema_validation": False, "nadi.codec": "stdlib"}
+        )
+        for records_path in [None, "$[*]", "$"]:
+            outputs = []
+            for passthrough in [True, False]:
+                self.source.supported_streams[-1] = SinglePageStream(
+                    "raw",
+                    "",
+                    Request("GET", "https://api.test/raw"),
+                    records_path=records_path,
+                    passthrough=passthrough,
+                )
+                self.output.seek(0)
+                self.output.truncate()
+                self.source.fetch_stream("raw")
+                outputs.append(self.output_records())
+            self.assertEqual(outputs[0], outputs[1])
+        self.assertFalse(self.source.get_stream("raw").can_passthrough())
+
+    def add_order_responses(self):
+        responses.get(
+            "https://api.test/orders",
+            json={"orders": [{"id": 1}, {"id": 2}, {"no_id": 3}]},
+        )
+        for order_id in [1, 2]:
+            responses.get(
+                f"https://api.test/orders/{order_id}/items",
+                json=[
+                    {"order_id": order_id, "item_id": f"{order_id}-{i}"} for i in [1, 2]
+                ],
+            )
+            for i in [1, 2]:
+                responses.get(
+                    f"https://api.test/orders/{order_id}/items/{order_id}-{i}",
+                    json={"detail": f"{order_id}-{i}"},
+                )
+
+    @responses.activate
+    def test_fetch_all_with_children(self):
+        self.add_order_responses()
+        RuntimeArguments.catalog = Catalog([{"name": "items"}, {"name": "orders"}])
+
+        self.source.fetch_all()
+        records = self.output_records()
+        self.assertEqual(
+            [{"id": 1}, {"id": 2}, {"no_id": 3}],
+            [r for r in records if "order_id" not in r],
+        )
+        self.assertEqual(
+            ["1-1", "1-2", "2-1", "2-2"],
+            sorted(r["item_id"] for r in records if "order_id" in r),
+        )
+        self.assertEqual(1, self.source.metrics.get("graph.unbound_records"))
+
+    @responses.activate
+    def test_fetch_all_with_implicit_parents(self):
+        self.add_order_responses()
+        RuntimeArguments.catalog = Catalog([{"name": "item_details"}])
+
+        self.source.fetch_all()
+        self.assertEqual(
+            ["1-1", "1-2", "2-1", "2-2"],
+            sorted(r["detail"] for r in self.output_records()),
+        )
+        self.assertEqual(6, self.source.metrics.get("graph.child_fetches"))
+
+    @responses.activate
+    def test_fetch_all_with_unsafe_parent_values(self):
+        responses.get("https://api.test/orders", json={"orders": [{"id": "a/b c"}]})
+        responses.get(
+            "https://api.test/orders/a%2Fb%20c/items",
+            json=[{"order_id": "a/b c", "item_id": "1"}],
+        )
+        RuntimeArguments.catalog = Catalog([{"name": "items"}])
+
+        self.source.fetch_all()
+        self.assertEqual([{"order_id": "a/b c", "item_id": "1"}], self.output_records())
+
+    def test_fetch_all_with_invalid_parents(self):
+        self.source.supported_streams = [
+            SinglePageStream(
+                "abc", "", Request("GET", "https://api.test/abc"), parent="def"
+            ),
+            SinglePageStream(
+                "def", "", Request("GET", "https://api.test/def"), parent="abc"
+            ),
+            SinglePageStream(
+                "ghi", "", Request("GET", "https://api.test/ghi"), parent="jkl"
+            ),
+        ]
+        RuntimeArguments.catalog = Catalog([{"name": "abc"}])
+        self.assertRaises(StreamGraphCycleError, self.source.fetch_all)
+        RuntimeArguments.catalog = Catalog([{"name": "ghi"}])
+        self.assertRaises(StreamParentNotSupportedError, self.source.fetch_all)
+
+    @responses.activate
+    def test_fetch_all_with_select(self):
+        responses.get(
+            "https://api.test/customers",
+            json=[{"id": 1, "name": "abc"}],
+            match=[responses.matchers.query_param_matcher({"fields": "id,name"})],
+        )
+        responses.get("https://api.test/abc", json=[{"id": 1, "name": "abc", "x": 1}])
+        RuntimeArguments.config = Config({})
+        RuntimeArguments.catalog = Catalog(
+            [{"name": "customers", "select": ["id", "name"]}]
+        )
+
+        self.source.fetch_all()
+        self.assertEqual([{"id": 1, "name": "abc"}], self.output_records())
+
+        self.output.seek(0)
+        self.output.truncate()
+        RuntimeArguments.config = Config(
+            {"nadi.output.enable_schema_validation": False}
+        )
+        RuntimeArguments.catalog = Catalog([{"name": "abc", "select": ["$.name"]}])
+        self.source.fetch_all()
+        self.assertEqual([{"name": "abc"}], self.output_records())
+
+    def test_pruned_schema_is_reused(self):
+        stream = self.source.get_stream("customers")
+        schema = stream.get_output_json_schema(Projection(["id", "name"]))
+        self.assertIs(schema, stream.get_output_json_schema(Projection(["id", "name"])))
+        self.assertIsNot(schema, stream.get_output_json_schema(Projection(["id"])))
+
+    @responses.activate
+    def test_fetch_with_limit(self):
+        responses.get(
+            "https://api.test/sized",
+            json=[{"id": 1}, {"id": 2, "next_page": 2}],
+            match=[responses.matchers.query_param_matcher({"per_page": "3"})],
+        )
+        responses.get(
+            "https://api.test/sized",
+            json=[{"id": 3}, {"id": 4, "next_page": 3}],
+            match=[
+                responses.matchers.query_param_matcher({"per_page": "3", "page": "2"})
+            ],
+        )
+
+        self.source.fetch_stream("sized", limit=3)
+        self.assertEqual([1, 2, 3], [r["id"] for r in self.output_records()])
+        self.assertEqual(2, len(responses.calls))
+
+    @responses.activate
+    def test_passthrough_with_limit(self):
+        responses.get("https://api.test/raw", body=b'[{"id": 1}, {"id": 2}, {"id": 3}]')
+        RuntimeArguments.config = Config(
+            {"nadi.output.enable_schema_validation": False, "nadi.codec": "stdlib"}
+        )
+
+        self.source.fetch_stream("raw", limit=2)
+        self.assertEqual(b'{"id": 1}\n{"id": 2}\n', self.output.getvalue())
+
+    @responses.activate
+    def test_fetch_all_with_dedup(self):
+        responses.get(
+            "https://api.test/events",
+            json=[{"id": 1}, {"id": 2}, {"id": 1}, {"id": 3}, {"id": 2}],
+        )
+        for mode in ["NONE", "EXACT", "BLOOM"]:
+            self.output.seek(0)
+            self.output.truncate()
+            self.source.metrics.reset()
+            RuntimeArguments.catalog = Catalog(
+                [{"name": "events", "configs": {"nadi.dedup.mode": mode}}]
+            )
+
+            self.source.fetch_all()
+            ids = [r["id"] for r in self.output_records()]
+            self.assertEqual([1, 2, 1, 3, 2] if mode == "NONE" else [1, 2, 3], ids)
+            self.assertEqual(
+                0 if mode == "NONE" else 2,
+                self.source.metrics.get("dedup.events.duplicates"),
+            )
+
+    @responses.activate
+    def test_fetch_all_with_dedup_keyless_records(self):
+        responses.get(
+            "https://api.test/events",
+            json=[{"id": 1}, {"no_id": 2}, {"id": 1}, {"no_id": 3}],
+        )
+        RuntimeArguments.catalog = Catalog(
+            [{"name": "events", "configs": {"nadi.dedup.mode": "EXACT"}}]
+        )
+
+        self.source.fetch_all()
+        self.assertEqual([{"id": 1}, {"no_id": 2}, {"no_id": 3}], self.output_records())
+        self.assertEqual(2, self.source.metrics.get("dedup.events.keyless_records"))
@@ -0,0 +1,216 @@
+from unittest import TestCase
+import io
+import json
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import date
+from decimal import Decimal
+
+from nadi.sdk.config import Configs, ConfigTypeInvalidError
+from nadi.sdk.input import *
+from nadi.sdk.sql import *
+
+
+class TestSqlQuery(TestCase):
+    def test_paramstyles(self):
+        for paramstyle, placeholders, params in [
+            ("qmark", ["?", "?"], [1, 2]),
+            ("format", ["%s", "%s"], [1, 2]),
+            ("numeric", [":1", ":2"], [1, 2]),
+            ("named", [":p1", ":p2"], {"p1": 1, "p2": 2}),
+            ("pyformat", ["%(p1)s", "%(p2)s"], {"p1": 1, "p2": 2}),
+        ]:
+            query = SqlQuery(paramstyle)
+            self.assertEqual(placeholders, [query.param(1), query.param(2)])
+            self.assertEqual(params, query.params)
+        self.assertRaises(SqlParamStyleNotSupportedError, SqlQuery("other").param, 1)
+
+    def test_build_query(self):
+        stream = SqlStream("users", "", "SELECT * FROM users", "id", split_column="id")
+        query = stream.build_query("qmark", ["id", "name"], 10, 0, 100, True)
+        self.assertEqual(
+            "SELECT id, name FROM (SELECT * FROM users) nadi_query "
+            "WHERE id > ? AND id >= ? AND id <= ? ORDER BY id",
+            query.sql,
+        )
+        self.assertEqual([10, 0, 100], query.params)
+        query = stream.build_query("qmark", None, None, 0, 100, False, True)
+        self.assertEqual(
+            "SELECT * FROM (SELECT * FROM users) nadi_query "
+            "WHERE (id >= ? AND id < ? OR id IS NULL) ORDER BY id",
+            query.sql,
+        )
+        self.assertRaises(
+            SqlColumnInvalidError, SqlStream, "users", "", "SELECT 1", "id; --"
+        )
+
+
+class TestSqlSource(TestCase):
+    def setUp(self) -> None:
+        self.supported_configs = list(Configs.supported_configs)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "test.db")
+        with closing(sqlite3.connect(self.path)) as connection:
+            connection.execute(
+                "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, age INTEGER)"
+            )
+            connection.executemany(
+                "INSERT INTO users VALUES (?, ?, ?)",
+                [(i, f"user {i}", i % 40) for i in range(1, 251)],
+            )
+            connection.commit()
+
+        self.source = SqlSource("test")
+        self.source.supported_streams = [
+            SqlStream(
+                "users",
+                "",
+                "SELECT id, name, age FROM users",
+                key_column="id",
+                split_column="id",
+                output_json_schema={"type": "object", "required": ["id"]},
+            ),
+        ]
+        self.output = io.BytesIO()
+        self.source.output = self.output
+        self.set_config()
+        RuntimeArguments.catalog = None
+        RuntimeArguments.state = None
+
+    def tearDown(self) -> None:
+        Configs.supported_configs = self.supported_configs
+        RuntimeArguments.config = None
+        RuntimeArguments.catalog = None
+        RuntimeArguments.state = None
+        self.directory.cleanup()
+
+    def set_config(self, **configs: object):
+        RuntimeArguments.config = Config(
+            dict(
+                {"nadi.sql.connection": self.path, "nadi.sql.batch_size": 32}, **configs
+            )
+        )
+
+    def output_records(self) -> list[dict[str, object]]:
+        return [json.loads(line) for line in self.output.getvalue().splitlines()]
+
+    def test_fetch_stream(self):
+        self.source.fetch_stream("users")
+        records = self.output_records()
+        self.assertEqual(list(range(1, 251)), [record["id"] for record in records])
+        self.assertEqual({"id": 1, "name": "user 1", "age": 1}, records[0])
+
+    def test_fetch_with_limit(self):
+        self.source.fetch_stream("users", limit=40)
+        self.assertEqual(
+            list(range(1, 41)), [record["id"] for record in self.output_records()]
+        )
+
+    def test_fetch_parallel(self):
+        self.set_config(**{"nadi.sql.parallelism": 3})
+        self.source.fetch_stream("users")
+        self.assertEqual(
+            list(range(1, 251)),
+            sorted(record["id"] for record in self.output_records()),
+        )
+
+        self.output.seek(0)
+        self.output.truncate()
+        self.source.fetch_stream("users", limit=50)
+        self.assertEqual(50, len(self.output_records()))
+
+        # rows without a split value are fetched too.
+        with closing(sqlite3.connect(self.path)) as connection:
+            connection.executemany(
+                "INSERT INTO users VALUES (?, ?, NULL)",
+                [(i, f"user {i}") for i in [251, 252]],
+            )
+            connection.commit()
+        self.source.supported_streams[0].split_column = "age"
+        self.output.seek(0)
+        self.output.truncate()
+        self.source.fetch_stream("users")
+        self.assertEqual(
+            list(range(1, 253)),
+            sorted(record["id"] for record in self.output_records()),
+        )
+
+    def test_fetch_all_resumes_after_key(self):
+        RuntimeArguments.catalog = Catalog(
+            [{"name": "users", "select": ["id", "name"]}]
+        )
+        RuntimeArguments.state = State(
+            [{"name": "users", "configs": {"nadi.sql.after": 245}}]
+        )
+        self.set_config(**{"nadi.sql.parallelism": 2})
+        self.source.fetch_all()
+        self.assertEqual(
+            [{"id": i, "name": f"user {i}"} for i in range(246, 251)],
+            sorted(self.output_records(), key=lambda record: record["id"]),
+        )
+
+    def test_fetch_converts_column_values(self):
+        with closing(sqlite3.connect(self.path)) as connection:
+            connection.execute(
+                "CREATE TABLE files (id INTEGER, data BLOB, size NUMERIC, added DATE)"
+            )
+            connection.executemany(
+                "INSERT INTO files VALUES (?, ?, ?, ?)",
+                [(1, b"\x00\xff", "12.5", "2024-01-31"), (2, None, None, None)],
+            )
+            connection.commit()
+        self.source.supported_streams = [
+            SqlStream(
+                "files",
+                "",
+                "SELECT * FROM files",
+                key_column="id",
+                output_json_schema={"type": "object"},
+            )
+        ]
+        sqlite3.register_converter("NUMERIC", lambda value: Decimal(value.decode()))
+        self.addCleanup(sqlite3.converters.pop, "NUMERIC")
+        sqlite3.register_converter(
+            "DATE", lambda value: date.fromisoformat(value.decode())
+        )
+        self.addCleanup(sqlite3.converters.pop, "DATE")
+        self.set_config(
+            **{
+                "nadi.sql.connection": {
+                    "database": self.path,
+                    "detect_types": sqlite3.PARSE_DECLTYPES,
+                }
+            }
+        )
+        self.source.fetch_stream("files")
+        self.assertEqual(
+            [
+                {"id": 1, "data": "AP8=", "size": "12.5", "added": "2024-01-31"},
+                {"id": 2, "data": None, "size": None, "added": None},
+            ],
+            self.output_records(),
+        )
+
+    def test_fetch_resumes_after_text_key(self):
+        RuntimeArguments.catalog = Catalog([{"name": "users", "select": ["name"]}])
+        # as given through the environment or command line.
+        configs = {
+            "nadi.sql.after": "245",
+            "nadi.output.enable_schema_validation": False,
+        }
+        self.set_config(**configs)
+        self.source.fetch_all()
+        self.assertEqual(
+            [{"name": f"user {i}"} for i in range(246, 251)], self.output_records()
+        )
+        self.assertEqual(250, self.source.metrics.get("sql.users.last_key", None))
+
+        self.source.metrics.reset()
+        self.set_config(**configs, **{"nadi.sql.parallelism": 2})
+        self.source.fetch_all()
+        self.assertIsNone(self.source.metrics.get("sql.users.last_key", None))
+
+        self.set_config(**dict(configs, **{"nadi.sql.after": "abc"}))
+        self.assertRaises(ConfigTypeInvalidError, self.source.fetch_all)
@@ -0,0 +1,20 @@
+from unittest import TestCase
+import subprocess
+import sys
+
+
+class TestStartup(TestCase):
+    def test_heavy_modules_are_imported_lazily(self):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, nadi.sdk.cli; "
+                "print(','.join(m for m in ['requests', 'jsonschema', 'jsonpath_ng', 'sqlite3'] "
+                "if m in sys.modules))",
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual("", result.stdout.strip())